@@ -54,13 +54,23 @@ export const useNotifications = (token: string | null) => {
     const ws = new WebSocket(`${WS_URL}/${userId}`);
 
     ws.onmessage = async (event) => {
-       const notif: Notification = JSON.parse(event.data);
+       const data = JSON.parse(event.data);
+        // Server heartbeat: answer it so the connection isn't closed as idle
+        if (data.type === "ping") {
+          ws.send(JSON.stringify({ type: "pong" }));
+          return;
+        }
+       const notif: Notification = data;
+        // Pushes are at-least-once: skip one we already have (same id)
+        const stored: Notification[] = JSON.parse(localStorage.getItem("notifications") || "[]");
+        if (stored.some((n) => n.id === notif.id)) return;
         dispatch(addNotification(notif));
         if (notif.title === "New Booking Request") {
           const res = await fetchData("/appointments/pendingAppointments");
           dispatch(setPendingAppointments(res));
         }
-        const updated = [notif, ...JSON.parse(localStorage.getItem("notifications") || "[]")];
+        const latest: Notification[] = JSON.parse(localStorage.getItem("notifications") || "[]");
+        const updated = [notif, ...latest.filter((n) => n.id !== notif.id)];
         localStorage.setItem("notifications", JSON.stringify(updated));
     };
 
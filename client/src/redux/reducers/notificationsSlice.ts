@@ -22,6 +22,8 @@ const notificationSlice = createSlice({
     },
 
     addNotification(state, action: PayloadAction<Notification>) {
+      // Pushes are at-least-once: a retried delivery can bring the same notification again
+      if (state.notifications.some((n) => n.id === action.payload.id)) return;
       state.notifications.unshift(action.payload);
     },
   }
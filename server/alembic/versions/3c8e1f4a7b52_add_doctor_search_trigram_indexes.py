@@ -0,0 +1,32 @@
+"""add doctor search trigram indexes
+
+Revision ID: 3c8e1f4a7b52
+Revises: d92b5e07c6f1
+Create Date: 2026-10-18 13:02:41.218574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e1f4a7b52'
+down_revision: Union[str, Sequence[str], None] = 'd92b5e07c6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_users_full_name_trgm', 'users', ['full_name'], unique=False, postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'})
+    op.create_index('ix_doctors_specialization_trgm', 'doctors', ['specialization'], unique=False, postgresql_using='gin', postgresql_ops={'specialization': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_doctors_specialization_trgm', table_name='doctors', postgresql_using='gin', postgresql_ops={'specialization': 'gin_trgm_ops'})
+    op.drop_index('ix_users_full_name_trgm', table_name='users', postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'})
+    # The pg_trgm extension is left installed, other objects may depend on it
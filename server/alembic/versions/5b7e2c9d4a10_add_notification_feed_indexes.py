@@ -0,0 +1,30 @@
+"""add notification feed indexes
+
+Revision ID: 5b7e2c9d4a10
+Revises: c3d1f7a9b2e4
+Create Date: 2026-10-18 11:02:17.530916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d4a10'
+down_revision: Union[str, Sequence[str], None] = 'c3d1f7a9b2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_notifications_user_unread', 'notifications', ['user_id', 'created_at'], unique=False, postgresql_where=sa.text('is_read = false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_user_unread', table_name='notifications', postgresql_where=sa.text('is_read = false'))
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
@@ -0,0 +1,38 @@
+"""add media cleanup queue
+
+Revision ID: 7f2b9d3e6a18
+Revises: 3c8e1f4a7b52
+Create Date: 2026-10-18 14:21:37.502119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2b9d3e6a18'
+down_revision: Union[str, Sequence[str], None] = '3c8e1f4a7b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_cleanup_queue',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_cleanup_queue_available_at'), 'media_cleanup_queue', ['available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_cleanup_queue_available_at'), table_name='media_cleanup_queue')
+    op.drop_table('media_cleanup_queue')
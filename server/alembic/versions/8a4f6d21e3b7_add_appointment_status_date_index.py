@@ -0,0 +1,28 @@
+"""add appointment status date index
+
+Revision ID: 8a4f6d21e3b7
+Revises: 5b7e2c9d4a10
+Create Date: 2026-10-18 11:40:52.204781
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f6d21e3b7'
+down_revision: Union[str, Sequence[str], None] = '5b7e2c9d4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointments_status_date_time', 'appointments', ['status', 'appointment_date', 'appointment_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_status_date_time', table_name='appointments')
@@ -0,0 +1,30 @@
+"""add appointment listing indexes
+
+Revision ID: d92b5e07c6f1
+Revises: 8a4f6d21e3b7
+Create Date: 2026-10-18 12:15:08.664913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd92b5e07c6f1'
+down_revision: Union[str, Sequence[str], None] = '8a4f6d21e3b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointments_patient_date_time', 'appointments', ['patient_id', 'appointment_date', 'appointment_time', 'id'], unique=False, postgresql_include=['status'])
+    op.create_index('ix_appointments_doctor_date_time', 'appointments', ['doctor_id', 'appointment_date', 'appointment_time', 'id'], unique=False, postgresql_include=['status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_doctor_date_time', table_name='appointments', postgresql_include=['status'])
+    op.drop_index('ix_appointments_patient_date_time', table_name='appointments', postgresql_include=['status'])
@@ -1,5 +1,7 @@
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
+from datetime import datetime, timezone
 from app.core.config import settings
 
 # Configure Cloudinary
@@ -22,30 +24,65 @@ def upload_file(file, folder: str = "medhelp_degrees"):
         return None
     
 
+def parse_url(file_url: str):
+    """
+    Splits a Cloudinary secure URL into the (public_id, resource_type) pair the delete API needs.
+    Images (and videos) are addressed without their extension, "raw" files (e.g. PDF degrees) with it.
+    """
+    # Example URLs:
+    # https://res.cloudinary.com/cloud_name/image/upload/v1234/medhelp_profiles/my_pic.jpg
+    # https://res.cloudinary.com/cloud_name/raw/upload/v1234/medhelp_degrees/degree.pdf
+    parts = file_url.split('/')
+    upload_index = parts.index("upload")
+    resource_type = parts[upload_index - 1]
+
+    # Skip the version segment ("v1234") if there is one, the rest is the folder and file name
+    path = parts[upload_index + 1:]
+    if path and path[0].startswith("v") and path[0][1:].isdigit():
+        path = path[1:]
+    public_id = "/".join(path)
+
+    if resource_type != "raw":
+        # Get the public_id without the extension (e.g., 'medhelp_profiles/my_pic' from 'medhelp_profiles/my_pic.jpg')
+        public_id = public_id.rsplit('.', 1)[0]
+    return public_id, resource_type
+
+
 def delete_file(image_url: str):
     """
     Deletes a file from Cloudinary using its secure URL.
-    Extracts the folder and file name to create the exact public_id Cloudinary needs.
+    Raises if Cloudinary couldn't delete it, so the cleanup queue can retry.
     """
     if not image_url:
         return
 
-    try:
-        # Example URL: https://res.cloudinary.com/cloud_name/image/upload/v1234/medhelp_profiles/my_pic.jpg
-        parts = image_url.split('/')
-        
-        # Get the file name without the extension (e.g., 'my_pic' from 'my_pic.jpg')
-        file_name = parts[-1].split('.')[0]
-        
-        # Get the folder name (e.g., 'medhelp_profiles')
-        folder_name = parts[-2]
-        
-        # Combine them to get the Cloudinary public_id: "medhelp_profiles/my_pic"
-        public_id = f"{folder_name}/{file_name}"
-        
-        # Tell Cloudinary to delete it permanently
-        cloudinary.uploader.destroy(public_id)
-        print(f"Successfully deleted {public_id} from Cloudinary.")
-        
-    except Exception as e:
-        print(f"Error deleting from Cloudinary: {e}")
\ No newline at end of file
+    public_id, resource_type = parse_url(image_url)
+
+    # Tell Cloudinary to delete it permanently ("not found" means it is already gone).
+    # destroy() defaults to resource_type "image", which would report raw files as "not found" and leave them
+    result = cloudinary.uploader.destroy(public_id, resource_type=resource_type).get("result")
+    if result not in ("ok", "not found"):
+        raise RuntimeError(f"Cloudinary could not delete {public_id}: {result}")
+    print(f"Successfully deleted {public_id} from Cloudinary.")
+
+
+def list_files(folder: str):
+    """
+    Every file stored in a folder, as (secure_url, created_at) pairs.
+    Uses the Admin API (rate limited), so only the orphan reconciliation calls it.
+    """
+    files = []
+    for resource_type in ("image", "raw"):
+        next_cursor = None
+        while True:
+            options = {"type": "upload", "resource_type": resource_type, "prefix": f"{folder}/", "max_results": 500}
+            if next_cursor:
+                options["next_cursor"] = next_cursor
+            page = cloudinary.api.resources(**options)
+            for resource in page.get("resources", []):
+                created_at = datetime.strptime(resource["created_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+                files.append((resource["secure_url"], created_at))
+            next_cursor = page.get("next_cursor")
+            if not next_cursor:
+                break
+    return files
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,18 +8,106 @@ class Settings(BaseSettings):
     
     # This must match the variable in your .env file
     DATABASE_URL: str
+
+    # Database engine / connection pool (per worker process)
+    DB_ECHO: bool = False  # log every SQL statement, for local debugging only
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replicas for read-only endpoints (get_read_db): comma-separated URLs, empty = primary only.
+    # A replica more than REPLICA_MAX_LAG_SECONDS behind (or unreachable) is skipped until it catches up.
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Serve Prometheus-format metrics at GET /metrics
+    METRICS_ENABLED: bool = True
+    # SQL statements per request vs. the route's @query_budget: "off", "warn" (print and count) or "raise" (tests)
+    QUERY_BUDGET_MODE: str = "off"
     
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
-    CLOUDINARY_CLOUD_NAME: str
-    CLOUDINARY_API_KEY: str
-    CLOUDINARY_API_SECRET: str
+    # bcrypt runs in its own thread pool, this caps how many hashes run at once
+    PASSWORD_HASH_CONCURRENCY: int = 4
+
+    # Where uploads are stored: "cloudinary" or "local" (files on this machine, served under /media)
+    MEDIA_BACKEND: str = "cloudinary"
+    MEDIA_LOCAL_ROOT: str = "media"
+    MEDIA_LOCAL_BASE_URL: str = "http://localhost:8000/media"
+
+    # Only needed when MEDIA_BACKEND is "cloudinary"
+    CLOUDINARY_CLOUD_NAME: Optional[str] = None
+    CLOUDINARY_API_KEY: Optional[str] = None
+    CLOUDINARY_API_SECRET: Optional[str] = None
+
+    # Media uploads/deletes run in their own thread pool, capped and with a timeout per call
+    MEDIA_UPLOAD_CONCURRENCY: int = 4
+    MEDIA_TIMEOUT_SECONDS: float = 30.0
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+
+    # Media cleanup queue: deletes of files nothing references anymore, retried with exponential backoff
+    MEDIA_CLEANUP_BATCH_SIZE: int = 50
+    MEDIA_CLEANUP_POLL_INTERVAL_SECONDS: float = 30.0
+    MEDIA_CLEANUP_MAX_ATTEMPTS: int = 8
+    MEDIA_CLEANUP_RETRY_BASE_SECONDS: float = 30.0
+    # Orphan reconciliation: compare stored files with the database every N seconds (0 = off).
+    # Files younger than the grace period are skipped, their upload may not be committed yet.
+    # The folders aren't namespaced per environment, so by default orphans are only counted (dry run):
+    # only turn deletion on where this database is the sole user of the storage account.
+    MEDIA_RECONCILE_INTERVAL_SECONDS: float = 6 * 60 * 60
+    MEDIA_RECONCILE_DELETE: bool = False
+    MEDIA_ORPHAN_GRACE_SECONDS: float = 24 * 60 * 60
 
     DAILY_API_KEY: str
     GOOGLE_CLIENT_ID: str
 
+    # Authenticated user cache (get_current_user)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # How WebSocket messages reach users connected to another worker: "postgres" (LISTEN/NOTIFY) or "local"
+    WS_FANOUT_BACKEND: str = "postgres"
+    # Per-connection outbound queue; a client that falls this far behind is disconnected
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 25.0
+    WS_IDLE_TIMEOUT_SECONDS: float = 90.0
+
+    # Cached unread notification counts (header badge)
+    UNREAD_COUNT_TTL_SECONDS: int = 30
+    UNREAD_COUNT_MAX_SIZE: int = 50000
+
+    # Notification outbox dispatcher
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+
+    # Background job completing past CONFIRMED appointments
+    APPOINTMENT_SWEEP_INTERVAL_SECONDS: float = 60.0
+    APPOINTMENT_SWEEP_BATCH_SIZE: int = 500
+
+    # Admin exports: rows fetched per round trip from the server-side cursor
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Public doctor directory (cached verified-doctor data)
+    # Set DOCTOR_DIRECTORY_IN_MEMORY=false to serve the public doctor endpoints straight from the database
+    DOCTOR_DIRECTORY_IN_MEMORY: bool = True
+    DOCTOR_DIRECTORY_TTL_SECONDS: int = 300
+    # How long browsers/CDN may reuse public doctor responses before revalidating (ETag / 304)
+    PUBLIC_CACHE_MAX_AGE_SECONDS: int = 30
+
+    # Doctor search: most results a single search can page through
+    SEARCH_MAX_RESULTS: int = 200
+
+    # Slot engine (in-memory doctor occupancy)
+    SLOT_CACHE_TTL_SECONDS: int = 30
+    SLOT_HORIZON_DAYS: int = 60
+
     class Config:
         env_file = ".env"
 
@@ -1,14 +1,70 @@
+import asyncio
+import itertools
+import time
+from typing import List, Optional
+
+from fastapi import Depends
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import registry
 
-# 1. Create the Async Engine
-# We use settings.DATABASE_URL from your config file
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True
+# Connection pool metrics (exposed at GET /metrics)
+POOL_WAIT_SECONDS = registry.histogram(
+    "medhelp_db_pool_wait_seconds",
+    "Time spent getting a connection from the pool (includes opening overflow connections)",
 )
+POOL_TIMEOUTS = registry.counter(
+    "medhelp_db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS",
+)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """The default async pool, timing every checkout."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+def _create_engine(url: str, poolclass=InstrumentedPool):
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,  # Logs every statement synchronously, keep it off in production
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+# 1. Create the Async Engine
+# We use settings.DATABASE_URL from your config file, pool sizing comes from the DB_* settings
+engine = _create_engine(settings.DATABASE_URL)
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Negative while the pool hasn't opened all of its 'size' connections yet
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+registry.gauge("medhelp_db_pool_size", "Configured pool size", lambda: engine.pool.size())
+registry.gauge("medhelp_db_pool_checked_out", "Connections currently in use", lambda: engine.pool.checkedout())
+registry.gauge("medhelp_db_pool_checked_in", "Idle connections in the pool", lambda: engine.pool.checkedin())
+registry.gauge("medhelp_db_pool_overflow", "Connections opened beyond the pool size", lambda: max(engine.pool.overflow(), 0))
 
 # 2. Create the Session Factory
 # This generates a new database session for every request
@@ -31,4 +87,138 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+# 5. Read replicas
+READ_SESSIONS = registry.counter(
+    "medhelp_db_read_sessions_total",
+    "Sessions handed out by get_read_db, by where they went",
+    ["target"],
+)
+
+# Seconds the replica is behind, NULL when it can't tell (the replica then counts as unhealthy).
+# "All received WAL is replayed" only means caught up while the WAL receiver is streaming: a stalled or
+# disconnected receiver also stops receiving, so without a streaming receiver the lag is unknown.
+# An idle primary sends no new WAL, so a streaming replica with nothing left to replay counts as 0.
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = _create_engine(url, poolclass=AsyncAdaptedQueuePool)
+        self.sessionmaker = sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = False  # until the first lag check says otherwise
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+class ReplicaRouter:
+    """
+    Hands out read-only sessions, round-robin over the replicas that passed their last lag check.
+    - A background task measures every replica's lag each 'check_interval' seconds
+    - A replica that is unreachable or more than 'max_lag' seconds behind is skipped until it recovers
+    - No replicas configured (or none healthy) -> sessions come from the primary, so reads never fail over to nothing
+    """
+
+    def __init__(self, urls: List[str], max_lag: float, check_interval: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._round_robin = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_interval)
+
+    async def check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                lag = (await asyncio.wait_for(conn.execute(REPLICA_LAG_QUERY), timeout=self.check_interval)).scalar()
+            if lag is None:
+                replica.healthy = False
+                replica.lag_seconds = None
+                replica.last_error = "WAL receiver is not streaming"
+                return
+            replica.lag_seconds = float(lag)
+            replica.last_error = None
+            replica.healthy = replica.lag_seconds <= self.max_lag
+        except Exception as e:
+            replica.healthy = False
+            replica.last_error = str(e)[:200]
+
+    def pick(self) -> Optional[Replica]:
+        """Next healthy replica, None when reads should go to the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            READ_SESSIONS.inc(target="primary")
+            return None
+        READ_SESSIONS.inc(target="replica")
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def session(self) -> AsyncSession:
+        replica = self.pick()
+        return AsyncSessionLocal() if replica is None else replica.sessionmaker()
+
+    def stats(self) -> dict:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "replicas": [
+                {
+                    "url": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
+)
+
+# Same as get_db, for endpoints that only read and can live with data 'REPLICA_MAX_LAG_SECONDS' old.
+# Never write through this session.
+# Without a healthy replica it is the request's primary session from get_db (FastAPI caches dependencies
+# per request, so the auth lookup and the endpoint share one session and one pooled connection).
+async def get_read_db(primary: AsyncSession = Depends(get_db)):
+    replica = replica_router.pick()
+    if replica is None:
+        yield primary
+        return
+    async with replica.sessionmaker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
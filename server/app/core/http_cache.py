@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# HTTP conditional GET helpers.
+# A response carries an ETag (and optionally Last-Modified); when the client sends it back
+# in If-None-Match / If-Modified-Since and nothing changed, it gets an empty 304 instead of the body.
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from anything that identifies the representation (versions, digests, bytes...)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110), compared weakly
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or _strip_weak(etag) in {_strip_weak(tag) for tag in tags}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def cached_json(
+    request: Request,
+    content: Any,
+    cache_control: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """
+    JSON response with validators, or a 304 when the client's copy is still current.
+    Pass 'etag' when it can be derived from a version/digest: a 304 then skips serializing the body.
+    Without it the ETag is a hash of the encoded body.
+    """
+    body = None
+    if etag is None:
+        body = JSONResponse(jsonable_encoder(content)).body
+        etag = make_etag(body)
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if body is None:
+        return JSONResponse(jsonable_encoder(content), headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
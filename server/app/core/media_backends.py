@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import secrets
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from fastapi import UploadFile
+
+# Stored files are referenced by URL everywhere (users.profile_picture, doctors.degree_upload_url),
+# a backend turns an upload into a URL and can later delete or list what it stored.
+# The methods are blocking; MediaStorage runs them in its thread pool.
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def upload(self, file: UploadFile, folder: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def delete(self, url: str):
+        ...
+
+    @abstractmethod
+    def list_files(self, folder: str) -> List[Tuple[str, datetime]]:
+        ...
+
+
+class CloudinaryBackend(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self):
+        from app.core.config import settings
+        if not (settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY and settings.CLOUDINARY_API_SECRET):
+            raise ValueError("MEDIA_BACKEND 'cloudinary' needs CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET")
+
+        # Imported here so the local backend works without the Cloudinary SDK configured
+        from app.core import cloudinary_utils
+        self._cloudinary = cloudinary_utils
+
+    def upload(self, file: UploadFile, folder: str) -> Optional[str]:
+        return self._cloudinary.upload_file(file, folder=folder)
+
+    def delete(self, url: str):
+        self._cloudinary.delete_file(url)
+
+    def list_files(self, folder: str) -> List[Tuple[str, datetime]]:
+        return self._cloudinary.list_files(folder)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Files on local disk, served by the app itself (GET /media/{folder}/{name}).
+    - Uploads are streamed to a temp file in chunks while being hashed, never held in memory
+    - Files are named after their SHA-256 plus a random suffix: every upload gets its own file (deleting one
+      user's file can never take another's identical upload with it) and a URL never changes content
+    """
+    name = "local"
+
+    CHUNK_SIZE = 1024 * 1024
+    # Folder and file names we produce; anything else in a URL/path is rejected
+    SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, folder: str, name: str) -> Optional[Path]:
+        """Path of a stored file, or None for names we could not have produced (e.g. '../')."""
+        if not (self.SAFE_NAME.match(folder) and self.SAFE_NAME.match(name)) or name.startswith("."):
+            return None
+        return self.root / folder / name
+
+    def upload(self, file: UploadFile, folder: str) -> Optional[str]:
+        directory = self.root / folder
+        directory.mkdir(parents=True, exist_ok=True)
+
+        extension = Path(file.filename or "").suffix.lower()
+        if not self.SAFE_NAME.match(extension.lstrip(".") or "x"):
+            extension = ""
+
+        digest = hashlib.sha256()
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=".upload-", delete=False) as tmp:
+            try:
+                while chunk := file.file.read(self.CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+
+        name = f"{digest.hexdigest()}-{secrets.token_hex(8)}{extension}"
+        # Atomic: the file appears complete or not at all
+        os.replace(tmp.name, directory / name)
+        return f"{self.base_url}/{folder}/{name}"
+
+    def _path_from_url(self, url: str) -> Optional[Path]:
+        if not url.startswith(self.base_url + "/"):
+            return None
+        parts = url[len(self.base_url) + 1:].split("/")
+        if len(parts) != 2:
+            return None
+        return self.path_for(*parts)
+
+    def delete(self, url: str):
+        path = self._path_from_url(url)
+        if path is None:
+            raise ValueError(f"{url} is not a file of this storage")
+        path.unlink(missing_ok=True)
+
+    def list_files(self, folder: str) -> List[Tuple[str, datetime]]:
+        directory = self.root / folder
+        if not directory.is_dir():
+            return []
+        files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    modified = datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+                    files.append((f"{self.base_url}/{folder}/{entry.name}", modified))
+        return files
+
+
+def create_storage_backend(name: str, local_root: str, local_base_url: str) -> StorageBackend:
+    if name == "cloudinary":
+        return CloudinaryBackend()
+    if name == "local":
+        return LocalBackend(local_root, local_base_url)
+    raise ValueError(f"Unknown MEDIA_BACKEND '{name}', expected 'cloudinary' or 'local'")
@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, Callable, List
+
+from fastapi import HTTPException
+
+# Keyset ("cursor") pagination helpers.
+# A cursor is the sort key of the last row on the previous page, e.g. [created_at, id],
+# encoded as an opaque URL-safe string the client just passes back.
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> List[Any]:
+    """
+    Decodes a cursor made by encode_cursor into its typed values, one parser per value
+    (e.g. UUID, date.fromisoformat). Anything that doesn't decode, has the wrong length
+    or doesn't parse is a client error, so crafted cursors get a 400 rather than a 500.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong cursor length")
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError("cursor values must be strings")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,202 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.routing import iter_route_contexts
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import registry
+
+# Per-route request metrics (exposed at GET /metrics).
+# Routes are labelled by their template ("/doctors/{doctor_id}"), never by the raw path, so the number
+# of series stays bounded. Anything the router didn't match is reported as "unmatched".
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Statements per request, a request doing 50+ is almost certainly an N+1
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUESTS = registry.counter(
+    "medhelp_http_requests_total",
+    "Finished HTTP requests",
+    ["method", "route", "status"],
+)
+REQUEST_SECONDS = registry.histogram(
+    "medhelp_http_request_duration_seconds",
+    "Time from receiving the request to sending the last byte of the response",
+    ["method", "route"],
+)
+REQUEST_DB_STATEMENTS = registry.histogram(
+    "medhelp_http_request_db_statements",
+    "SQL statements executed while handling one request",
+    ["method", "route"],
+    buckets=STATEMENT_BUCKETS,
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "medhelp_http_request_db_seconds",
+    "Time spent inside SQL statements while handling one request",
+    ["method", "route"],
+)
+DB_STATEMENT_SECONDS = registry.histogram(
+    "medhelp_db_statement_seconds",
+    "Duration of every SQL statement, including the ones run by background workers",
+)
+DB_STATEMENT_ERRORS = registry.counter(
+    "medhelp_db_statement_errors_total",
+    "SQL statements that raised",
+)
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    "medhelp_query_budget_exceeded_total",
+    "Requests that ran more SQL statements than their route's query_budget",
+    ["method", "route"],
+)
+
+QUERY_BUDGET_MODES = ("off", "warn", "raise")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(max_statements: int):
+    """
+    Declare how many SQL statements one request to this endpoint may run, dependencies (auth) included.
+    Put it under the @router decorator. Checked by RequestMetricsMiddleware according to QUERY_BUDGET_MODE.
+    Budgets are for the worst case the route allows (cold caches, largest page), not the average.
+    """
+
+    def decorator(endpoint):
+        endpoint.query_budget = max_statements
+        return endpoint
+
+    return decorator
+
+
+class RequestStats:
+    """What the current request has done against the database so far."""
+
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by RequestMetricsMiddleware for the lifetime of one request.
+# SQLAlchemy runs the driver calls in a greenlet that shares the caller's context, so the hooks below see it.
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+# SQLAlchemy hooks. Listening on the Engine class covers the primary and every replica engine.
+# A stack per connection, because a statement can fail without reaching after_cursor_execute
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("statement_started"):
+        DB_STATEMENT_ERRORS.inc()
+        _record_statement(conn)
+
+
+def _record_statement(conn):
+    started = conn.info.get("statement_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    DB_STATEMENT_SECONDS.observe(elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware), so streamed responses are timed until their last chunk
+    and the request runs in the same context as the SQLAlchemy hooks.
+    - record_metrics: feed the per-route histograms above
+    - budget_mode: what to do when a request exceeds its route's query_budget ("off", "warn" or "raise").
+      "raise" fails the request after its response is sent, so test clients (httpx ASGITransport, TestClient)
+      re-raise it; use "warn" on real servers.
+    """
+
+    def __init__(self, app, record_metrics: bool = True, budget_mode: str = "off"):
+        if budget_mode not in QUERY_BUDGET_MODES:
+            raise ValueError(f"QUERY_BUDGET_MODE must be one of {QUERY_BUDGET_MODES}, got '{budget_mode}'")
+        self.app = app
+        self.record_metrics = record_metrics
+        self.budget_mode = budget_mode
+        # id(route) -> full route template; routers are included with a prefix that the route itself doesn't know
+        self._templates: Dict[int, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        status = 500  # if the app raises before starting a response
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_stats.reset(token)
+            method = scope["method"]
+            route = self._route_template(scope)
+            if self.record_metrics:
+                REQUESTS.inc(method=method, route=route, status=status)
+                REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+                REQUEST_DB_STATEMENTS.observe(stats.statements, method=method, route=route)
+                REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route)
+
+        # Only for requests that didn't raise, a failing request shouldn't also be reported as over budget
+        if self.budget_mode != "off":
+            self._check_budget(scope, method, route, stats)
+
+    def _check_budget(self, scope, method: str, route: str, stats: RequestStats):
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is None or stats.statements <= budget:
+            return
+        QUERY_BUDGET_EXCEEDED.inc(method=method, route=route)
+        message = f"{method} {route} ran {stats.statements} SQL statements, its query budget is {budget}"
+        if self.budget_mode == "raise":
+            raise QueryBudgetExceeded(message)
+        print(f"Query budget exceeded: {message}")
+
+    def _route_template(self, scope) -> str:
+        # The router stores the matched route in the scope
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(id(route))
+        if template is None:
+            self._templates = {
+                id(context.original_route): context.path
+                for context in iter_route_contexts(scope["app"].routes)
+                if context.path is not None
+            }
+            template = self._templates.setdefault(id(route), getattr(route, "path", UNMATCHED_ROUTE))
+        return template
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
@@ -15,6 +17,50 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# 4. Async versions for request handlers
+# A bcrypt round takes ~200ms of CPU. Running it inline freezes the whole worker,
+# so it goes to a dedicated thread pool (bcrypt releases the GIL) behind a concurrency cap.
+class PasswordHasher:
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bcrypt")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0      # queue depth: callers waiting for a free slot
+        self.in_flight = 0    # hashes currently running
+        self.completed = 0
+
+    async def _run(self, fn, *args):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
+
+password_hasher = PasswordHasher(max_concurrency=settings.PASSWORD_HASH_CONCURRENCY)
+
 # Create Access Token
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
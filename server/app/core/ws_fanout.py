@@ -0,0 +1,194 @@
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+# Called with (user_id, message) to push a message to the sockets held by THIS worker
+DeliverCallback = Callable[[UUID, dict], Awaitable[None]]
+# Called with an event's data on every worker but the one that published it (e.g. cache invalidations)
+EventHandler = Callable[[dict], None]
+
+
+class FanoutBackend(ABC):
+    """
+    Relays WebSocket messages between workers.
+    The ConnectionManager always delivers to its own sockets first, then publish()
+    hands the message to every OTHER worker, which delivers it to the sockets it holds.
+    publish_event() / subscribe() carry small worker-to-worker events over the same channel.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[EventHandler]] = {}
+
+    def subscribe(self, event: str, handler: EventHandler):
+        """Runs handler(data) for every 'event' another worker publishes. Keep handlers quick, they run inline."""
+        self._handlers.setdefault(event, []).append(handler)
+
+    def _dispatch_event(self, event: str, data: dict):
+        for handler in self._handlers.get(event, ()):
+            try:
+                handler(data)
+            except Exception as e:
+                print(f"WebSocket fan-out: '{event}' handler failed: {e}")
+
+    async def start(self, deliver: DeliverCallback):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, user_id: UUID, message: dict):
+        """Raises when the message could not be handed to the other workers, so the caller can retry."""
+
+    @abstractmethod
+    async def publish_event(self, event: str, data: dict):
+        """Hands an event to the other workers' subscribers. Raises when it couldn't."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class LocalFanout(FanoutBackend):
+    """Single worker setup: there is nobody else to tell."""
+
+    async def publish(self, user_id: UUID, message: dict):
+        return None
+
+    async def publish_event(self, event: str, data: dict):
+        return None
+
+    def stats(self) -> dict:
+        return {"backend": "local"}
+
+
+class PostgresFanout(FanoutBackend):
+    """
+    Uses Postgres LISTEN/NOTIFY on one channel, so multiple uvicorn workers
+    need nothing beyond the database we already have.
+    Every worker tags its messages with an id and ignores its own echoes.
+    """
+
+    # NOTIFY payloads are capped at 8000 bytes by Postgres
+    MAX_PAYLOAD_BYTES = 7900
+    RECONNECT_DELAY_SECONDS = 2
+
+    def __init__(self, database_url: str, channel: str = "medhelp_ws"):
+        super().__init__()
+        # SQLAlchemy URL ("postgresql+asyncpg://...") -> plain libpq DSN for asyncpg
+        url = make_url(database_url).set(drivername="postgresql")
+        self.dsn = url.render_as_string(hide_password=False)
+        self.channel = channel
+        self.worker_id = uuid.uuid4().hex
+
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._publish_conn: Optional[asyncpg.Connection] = None
+        self._publish_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks, so hold on to the deliveries in flight
+        self._deliveries: Set[asyncio.Task] = set()
+        self._stopping = False
+
+        self.published = 0
+        self.received = 0
+        self.dropped = 0  # too large to relay, not retried
+        self.failed = 0   # NOTIFY failed, raised to the caller
+
+    async def start(self, deliver: DeliverCallback):
+        await super().start(deliver)
+        self._stopping = False
+        try:
+            await self._listen()
+        except Exception as e:
+            print(f"WebSocket fan-out: could not LISTEN yet ({e}), retrying in the background")
+            self._schedule_reconnect()
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        for task in list(self._deliveries):
+            task.cancel()
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = None
+        self._publish_conn = None
+
+    async def _listen(self):
+        self._listen_conn = await asyncpg.connect(self.dsn)
+        self._listen_conn.add_termination_listener(lambda conn: self._schedule_reconnect())
+        await self._listen_conn.add_listener(self.channel, self._on_notify)
+
+    def _schedule_reconnect(self):
+        if self._stopping or (self._reconnect_task and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while not self._stopping:
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            try:
+                await self._listen()
+                return
+            except Exception as e:
+                print(f"WebSocket fan-out: LISTEN reconnect failed: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        data = json.loads(payload)
+        if data["origin"] == self.worker_id:
+            return
+        self.received += 1
+        if "event" in data:
+            self._dispatch_event(data["event"], data["data"])
+            return
+        task = asyncio.create_task(self._deliver(UUID(data["user_id"]), data["message"]))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def publish(self, user_id: UUID, message: dict):
+        payload = json.dumps({"origin": self.worker_id, "user_id": str(user_id), "message": message})
+        if len(payload.encode()) > self.MAX_PAYLOAD_BYTES:
+            # Too big for NOTIFY; other workers' clients will still see it in their feed
+            self.dropped += 1
+            print(f"WebSocket fan-out: message for {user_id} too large to relay")
+            return
+        await self._notify(payload)
+
+    async def publish_event(self, event: str, data: dict):
+        await self._notify(json.dumps({"origin": self.worker_id, "event": event, "data": data}))
+
+    async def _notify(self, payload: str):
+        async with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.is_closed():
+                    self._publish_conn = await asyncpg.connect(self.dsn)
+                await self._publish_conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                self.published += 1
+            except Exception:
+                self._publish_conn = None
+                self.failed += 1
+                raise
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres",
+            "listening": self._listen_conn is not None and not self._listen_conn.is_closed(),
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def create_fanout_backend(name: str, database_url: str) -> FanoutBackend:
+    if name == "postgres":
+        return PostgresFanout(database_url)
+    if name == "local":
+        return LocalFanout()
+    raise ValueError(f"Unknown WS_FANOUT_BACKEND '{name}', expected 'postgres' or 'local'")
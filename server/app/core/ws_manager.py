@@ -1,25 +1,156 @@
+import asyncio
+import time
 from fastapi import WebSocket
-from typing import Dict
+from typing import Dict, Optional, Set
 from uuid import UUID
 
+from app.core.config import settings
+from app.core.ws_fanout import FanoutBackend, create_fanout_backend
+
+# Close codes
+SLOW_CONSUMER = 1013  # "Try again later": the client couldn't keep up with its queue
+IDLE_TIMEOUT = 1001   # "Going away": no frame from the client for too long
+
+class ClientConnection:
+    """One open socket. A user can hold several (one per tab/device)."""
+
+    def __init__(self, websocket: WebSocket, user_id: UUID, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        # Outbound messages wait here, the writer task is the only one calling send_json
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+        self.closed = False
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
 class ConnectionManager:
-    def __init__(self):
-        # Maps a user's UUID to their active WebSocket connection
-        self.active_connections: Dict[UUID, WebSocket] = {}
+    def __init__(self, fanout: FanoutBackend, queue_size: int, heartbeat_interval: float, idle_timeout: float):
+        # Maps a user's UUID to every socket they have open (on this worker)
+        self.active_connections: Dict[UUID, Set[ClientConnection]] = {}
+        # Relays messages to users connected to other workers
+        self.fanout = fanout
+
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+
+        # Closes of evicted sockets still in flight (the loop only keeps weak references to tasks)
+        self._closing: Set[asyncio.Task] = set()
+
+        self.evicted_slow = 0
+        self.closed_idle = 0
+
+    async def start(self):
+        await self.fanout.start(self.deliver_local)
+
+    async def stop(self):
+        await self.fanout.stop()
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                await self.close(connection)
 
-    async def connect(self, websocket: WebSocket, user_id: UUID):
+    async def connect(self, websocket: WebSocket, user_id: UUID) -> ClientConnection:
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        connection = ClientConnection(websocket, user_id, self.queue_size)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        return connection
 
-    def disconnect(self, user_id: UUID):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+    def disconnect(self, connection: ClientConnection):
+        connection.closed = True
+        connections = self.active_connections.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.active_connections[connection.user_id]
+
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def close(self, connection: ClientConnection, code: int = 1000):
+        if connection.closed:
+            return
+        self.disconnect(connection)
+        await self._close_socket(connection.websocket, code)
+
+    async def _close_socket(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=5)
+        except Exception:
+            pass  # Already gone (or too stuck to say goodbye)
+
+    async def _writer(self, connection: ClientConnection):
+        try:
+            # Pings go out on a fixed schedule whatever the traffic: a client that is only ever sent
+            # messages still has to answer one, or the first quiet spell would look like an idle client
+            next_ping = time.monotonic() + self.heartbeat_interval
+            while True:
+                message = None
+                remaining = next_ping - time.monotonic()
+                if remaining > 0:
+                    try:
+                        message = await asyncio.wait_for(connection.queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if time.monotonic() >= next_ping:
+                    # Check the client answered one of the earlier pings, then ping it again
+                    if time.monotonic() - connection.last_seen > self.idle_timeout:
+                        self.closed_idle += 1
+                        await self.close(connection, code=IDLE_TIMEOUT)
+                        return
+                    await self._send(connection, {"type": "ping"})
+                    next_ping = time.monotonic() + self.heartbeat_interval
+
+                if message is not None:
+                    await self._send(connection, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self.close(connection)
+
+    async def _send(self, connection: ClientConnection, message: dict):
+        # A send that hangs this long means the client is effectively gone
+        await asyncio.wait_for(connection.websocket.send_json(message), timeout=self.heartbeat_interval)
+
+    async def deliver_local(self, user_id: UUID, message: dict):
+        # Never waits on a socket: messages are queued and written by each connection's writer task
+        for connection in list(self.active_connections.get(user_id, ())):
+            try:
+                connection.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Drop the slow client right away, but don't wait on its socket to close it
+                self.evicted_slow += 1
+                self.disconnect(connection)
+                task = asyncio.create_task(self._close_socket(connection.websocket, SLOW_CONSUMER))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
 
     async def send_personal_message(self, message: dict, user_id: UUID):
-        # Only send if the user is currently online
-        websocket = self.active_connections.get(user_id)
-        if websocket:
-            await websocket.send_json(message)
+        """
+        Raises if the relay to the other workers failed. The local sockets already have the message by then,
+        so a retry can deliver it to them twice: clients dedupe by notification id.
+        """
+        await self.deliver_local(user_id, message)
+        # The user may (also) be connected to another worker
+        await self.fanout.publish(user_id, message)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.active_connections),
+            "connections": sum(len(connections) for connections in self.active_connections.values()),
+            "evicted_slow": self.evicted_slow,
+            "closed_idle": self.closed_idle,
+            "fanout": self.fanout.stats(),
+        }
 
 # Create a single global instance to use across app
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(
+    create_fanout_backend(settings.WS_FANOUT_BACKEND, settings.DATABASE_URL),
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    heartbeat_interval=settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+    idle_timeout=settings.WS_IDLE_TIMEOUT_SECONDS,
+)
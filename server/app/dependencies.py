@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.services.user import get_user_by_email
+from app.services.user import get_cached_user_by_email
 from app.models.user import User
 
 # This tells FastAPI that the token comes from the "/auth/login" endpoint
@@ -31,8 +31,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # Check if user exists in DB
-    user = await get_user_by_email(db, email=email)
+    # Check if user exists (cached, falls back to the DB)
+    user = await get_cached_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
         
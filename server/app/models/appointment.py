@@ -38,4 +38,17 @@ class Appointment(Base):
             unique=True,
             postgresql_where=text("status NOT IN ('CANCELLED', 'REJECTED')")
         ),
+        # Lets the background sweeper find past CONFIRMED appointments without a table scan
+        Index('ix_appointments_status_date_time', 'status', 'appointment_date', 'appointment_time'),
+        # Paginated "my appointments" listings, newest first, status is carried along for the filter
+        Index(
+            'ix_appointments_patient_date_time',
+            'patient_id', 'appointment_date', 'appointment_time', 'id',
+            postgresql_include=['status']
+        ),
+        Index(
+            'ix_appointments_doctor_date_time',
+            'doctor_id', 'appointment_date', 'appointment_time', 'id',
+            postgresql_include=['status']
+        ),
     )
\ No newline at end of file
@@ -7,3 +7,5 @@ from app.models.doctor import Doctor
 from app.models.availability import DoctorAvailability
 from app.models.appointment import Appointment
 from app.models.notification import Notification
+from app.models.outbox import NotificationOutbox
+from app.models.media import MediaCleanup
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -27,3 +27,11 @@ class Doctor(Base):
     user = relationship("User", back_populates="doctor")
     availabilities = relationship("DoctorAvailability", back_populates="doctor", cascade="all, delete-orphan")
     appointments = relationship("Appointment", back_populates="doctor", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Trigram index (pg_trgm) for substring / fuzzy specialization search
+        Index(
+            'ix_doctors_specialization_trgm', 'specialization',
+            postgresql_using='gin', postgresql_ops={'specialization': 'gin_trgm_ops'}
+        ),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class MediaCleanup(Base):
+    """
+    One row per stored file that has to be deleted.
+    Written in the same transaction that drops the last reference to the file,
+    deleted by the cleanup worker once the storage provider confirmed it.
+    """
+    __tablename__ = "media_cleanup_queue"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    url = Column(String, nullable=False)
+
+    # Retry bookkeeping
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
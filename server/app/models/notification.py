@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -14,4 +14,14 @@ class Notification(Base):
     message = Column(String, nullable=False)
     notification_type = Column(String, nullable=False)
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # Feed: newest first per user, keyset on (created_at, id)
+        Index('ix_notifications_user_created', 'user_id', 'created_at', 'id'),
+        # Unread list + badge count, only the (few) unread rows are indexed
+        Index(
+            'ix_notifications_user_unread',
+            'user_id', 'created_at',
+            postgresql_where=text("is_read = false")
+        ),
+    )
\ No newline at end of file
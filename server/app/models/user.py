@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 from sqlalchemy.dialects.postgresql import UUID
@@ -38,4 +38,12 @@ class User(Base):
     # One-to-One relationship (User can be a Doctor)
     # uselist=False ensures we get a single object, not a list
     doctor = relationship("Doctor", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="patient", cascade="all, delete-orphan")
\ No newline at end of file
+    appointments = relationship("Appointment", back_populates="patient", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Trigram index (pg_trgm) for substring / fuzzy doctor name search
+        Index(
+            'ix_users_full_name_trgm', 'full_name',
+            postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}
+        ),
+    )
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import desc, select
 from sqlalchemy.orm import selectinload
 from typing import List
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.request_metrics import query_budget
+from app.core.database import get_db, get_read_db, pool_stats, replica_router
 from app.models.user import User
 from app.models.doctor import Doctor
 from app.models.appointment import Appointment
@@ -13,16 +14,28 @@ from app.dependencies import verify_admin
 from app.schemas.admin import PendingDoctorResponse, RejectDoctorRequest, VerifyDoctorResponse
 from app.schemas.user import UserResponse
 from app.schemas.appointment import AppointmentResponse
-from app.core.cloudinary_utils import delete_file
-from app.services.notification import send_notification
+from app.core.security import password_hasher
+from app.core.ws_manager import manager
+from app.schemas.notification import NotificationCreate
+from app.services.directory import doctor_directory
+from app.services.export import ExportFormat, stream_export
+from app.services.media_cleanup import media_cleanup, queue_media_cleanup
+from app.services.notification import queue_notifications
+from app.services.outbox import notification_dispatcher
+from app.services.slots import slot_engine
+from app.services.storage import media_storage
+from app.services.sweeper import appointment_sweeper
+from app.services.unread_counter import unread_counter
+from app.services.user import invalidate_cached_user, user_cache
 
 router = APIRouter()
 
 # GET PENDING DOCTORS
 @router.get("/doctors/pending", response_model=List[PendingDoctorResponse])
+@query_budget(3)
 async def get_pending_doctors(
     admin: User = Depends(verify_admin), 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = (
         select(Doctor)
@@ -36,6 +49,7 @@ async def get_pending_doctors(
 
 # APPROVE A DOCTOR
 @router.patch("/doctors/{doctor_id}/verify", response_model=VerifyDoctorResponse)
+@query_budget(9)
 async def verify_doctor(
     doctor_id: UUID,
     admin: User = Depends(verify_admin), 
@@ -58,15 +72,22 @@ async def verify_doctor(
     doctor.user.is_verified = True
     doctor.user.role = "doctor"
 
+    await queue_notifications(db, [
+        NotificationCreate(
+            user_id=doctor.user_id,
+            title="Profile Verified",
+            message="Congratulations! Your medical profile is approved. You can now accept bookings.",
+            notification_type="SUCCESS"
+        )
+    ])
+
     await db.commit()
+    notification_dispatcher.wake()
 
-    await send_notification(
-        db=db,
-        user_id=doctor.user_id,
-        title="Profile Verified",
-        message="Congratulations! Your medical profile is approved. You can now accept bookings.",
-        notification_type="SUCCESS"
-    )
+    await invalidate_cached_user(doctor.user.email)
+    await doctor_directory.refresh_doctor(db, doctor.user_id)
+    slot_engine.invalidate(doctor.id)
+    slot_engine.invalidate_specializations()
     
     return {
         "message": f"Doctor {doctor.user.full_name} has been successfully verified.", 
@@ -75,6 +96,7 @@ async def verify_doctor(
 
 # REJECT A DOCTOR APPLICATION
 @router.patch("/doctors/{doctor_id}/reject", response_model=VerifyDoctorResponse)
+@query_budget(11)
 async def reject_doctor(
     doctor_id: UUID,
     payload: RejectDoctorRequest,
@@ -96,21 +118,28 @@ async def reject_doctor(
     if doctor.user.is_verified:
         raise HTTPException(status_code=400, detail="Cannot reject a doctor who is already verified.")
     
-    await send_notification(
-        db=db,
-        user_id=doctor.user_id,
-        title="Application Declined",
-        message=f"Your application to join as a doctor was not approved. Reason: {payload.reason}",
-        notification_type="WARNING"
-    )
+    await queue_notifications(db, [
+        NotificationCreate(
+            user_id=doctor.user_id,
+            title="Application Declined",
+            message=f"Your application to join as a doctor was not approved. Reason: {payload.reason}",
+            notification_type="WARNING"
+        )
+    ])
 
-    # Delete the uploaded document from Cloudinary here
-    if doctor.degree_upload_url:
-        delete_file(doctor.degree_upload_url)
+    # The uploaded document is deleted from Cloudinary by the cleanup worker, once this is committed
+    queue_media_cleanup(db, [doctor.degree_upload_url])
 
     # Delete the pending doctor record so they can apply again with correct info
     await db.delete(doctor)
     await db.commit()
+    notification_dispatcher.wake()
+    media_cleanup.wake()
+
+    # Not verified yet, so never in the public directory: nothing to update there
+    await invalidate_cached_user(doctor.user.email)
+    slot_engine.invalidate(doctor_id)
+    slot_engine.invalidate_specializations()
     
     return {
         "message": f"Doctor {doctor.user.full_name}'s application has been rejected and they have been notified.", 
@@ -119,6 +148,7 @@ async def reject_doctor(
 
 # Delete User
 @router.delete("/users/{user_id}", tags=["Admin"])
+@query_budget(12)
 async def delete_user(
     user_id: UUID,
     admin: User = Depends(verify_admin), 
@@ -141,15 +171,23 @@ async def delete_user(
     query_doctor = await db.execute(select(Doctor).where(Doctor.user_id == user_id))
     doctor_to_delete = query_doctor.scalars().first()
 
+    # Their files are deleted from Cloudinary by the cleanup worker, once this is committed
     if user_to_delete.profile_picture and "pixabay.com" not in user_to_delete.profile_picture:
-        delete_file(user_to_delete.profile_picture)
+        queue_media_cleanup(db, [user_to_delete.profile_picture])
 
-    if doctor_to_delete and doctor_to_delete.degree_upload_url:
-        delete_file(doctor_to_delete.degree_upload_url)
+    if doctor_to_delete:
+        queue_media_cleanup(db, [doctor_to_delete.degree_upload_url])
 
     # Delete the user (SQLAlchemy cascade will handle their doctor profile/appointments)
     await db.delete(user_to_delete)
     await db.commit()
+    media_cleanup.wake()
+
+    await invalidate_cached_user(user_to_delete.email)
+    if doctor_to_delete:
+        await doctor_directory.remove_doctor(user_id)
+        slot_engine.invalidate(doctor_to_delete.id)
+        slot_engine.invalidate_specializations()
     
     return {
         "message": f"User '{user_to_delete.email}' and all associated data have been permanently deleted.",
@@ -158,22 +196,76 @@ async def delete_user(
 
 # Get All Users
 @router.get("/users", response_model=List[UserResponse])
+@query_budget(2)
 async def get_all_users(
     current_user: User = Depends(verify_admin),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = await db.execute(select(User).order_by(desc(User.created_at)))
     return query.scalars().all()
 
 # Get All Appointments
 @router.get("/appointments", response_model=List[AppointmentResponse])
+@query_budget(2)
 async def get_all_appointments(
     current_user: User = Depends(verify_admin),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # AppointmentResponse doesn't include doctor/patient, so don't load them
     query = await db.execute(
         select(Appointment)
-        .options(selectinload(Appointment.doctor), selectinload(Appointment.patient))
         .order_by(desc(Appointment.appointment_date), desc(Appointment.appointment_time))
     )
-    return query.scalars().all()
\ No newline at end of file
+    return query.scalars().all()
+
+# Export All Users (streamed, constant memory)
+@router.get("/export/users")
+@query_budget(2)
+async def export_users(
+    format: ExportFormat = Query("ndjson", description="ndjson or csv"),
+    current_user: User = Depends(verify_admin)
+):
+    query = (
+        select(
+            User.id, User.email, User.full_name, User.phone_number, User.role,
+            User.is_active, User.is_verified, User.created_at
+        )
+        .order_by(desc(User.created_at))
+    )
+    return stream_export(query, format, "users")
+
+# Export All Appointments (streamed, constant memory)
+@router.get("/export/appointments")
+@query_budget(2)
+async def export_appointments(
+    format: ExportFormat = Query("ndjson", description="ndjson or csv"),
+    current_user: User = Depends(verify_admin)
+):
+    query = (
+        select(
+            Appointment.id, Appointment.doctor_id, Appointment.patient_id,
+            Appointment.appointment_date, Appointment.appointment_time,
+            Appointment.status, Appointment.appointment_type, Appointment.meeting_link
+        )
+        .order_by(desc(Appointment.appointment_date), desc(Appointment.appointment_time))
+    )
+    return stream_export(query, format, "appointments")
+
+# Runtime Statistics (caches, hashing queue)
+@router.get("/stats")
+@query_budget(1)
+async def get_runtime_stats(current_user: User = Depends(verify_admin)):
+    return {
+        "db_pool": pool_stats(),
+        "db_replicas": replica_router.stats(),
+        "user_cache": user_cache.stats(),
+        "slot_engine": slot_engine.stats(),
+        "doctor_directory": doctor_directory.stats(),
+        "unread_counts": unread_counter.stats(),
+        "password_hasher": password_hasher.stats(),
+        "media_storage": media_storage.stats(),
+        "media_cleanup": media_cleanup.stats(),
+        "notification_outbox": notification_dispatcher.stats(),
+        "websockets": manager.stats(),
+        "appointment_sweeper": appointment_sweeper.stats(),
+    }
\ No newline at end of file
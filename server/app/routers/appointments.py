@@ -1,21 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, update, or_, desc
-from datetime import date, datetime
+from sqlalchemy import select, and_, desc, tuple_
+from datetime import date, datetime, time
 from uuid import UUID
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.request_metrics import query_budget
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import cached_json, make_etag
+from app.core.pagination import decode_cursor, encode_cursor
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.doctor import Doctor
 from app.models.appointment import Appointment
 from app.models.availability import DoctorAvailability
 from app.schemas.appointment import AppointmentCreate
-from app.schemas.appointment import AppointmentResponse, AppointmentUpdate
-from app.services.notification import send_notification
+from app.schemas.appointment import AppointmentResponse, AppointmentStatus, AppointmentUpdate
+from app.schemas.notification import NotificationCreate
+from app.services.notification import queue_notifications
+from app.services.outbox import notification_dispatcher
+from app.services.slots import slot_engine
 from app.services.video import create_video_room
 from app.dependencies import verify_doctor
 
@@ -23,6 +29,7 @@ router = APIRouter()
 
 # Book an Appointment
 @router.post("/book", status_code=status.HTTP_201_CREATED)
+@query_budget(9)
 async def book_appointment(
     booking_data: AppointmentCreate,
     current_user: User = Depends(get_current_user),
@@ -120,6 +127,23 @@ async def book_appointment(
     )
     
     db.add(new_appointment)
+
+    # Notify the Patient and the Doctor (saved together with the appointment)
+    await queue_notifications(db, [
+        NotificationCreate(
+            user_id=current_user.id,
+            title="Appointment Requested",
+            message=f"Your request with Dr. {doctor.user.full_name} is pending confirmation.",
+            notification_type="INFO"
+        ),
+        NotificationCreate(
+            user_id=doctor.user_id,
+            title="New Booking Request",
+            message=f"A patient has requested an appointment on {booking_data.appointment_date} at {clean_time}.",
+            notification_type="INFO"
+        ),
+    ])
+
     try:
         await db.commit()
         await db.refresh(new_appointment)
@@ -127,34 +151,34 @@ async def book_appointment(
         # This catches the race condition if two people book the EXACT same active slot
         await db.rollback()
         raise HTTPException(status_code=409, detail="Slot was just taken by someone else.")
-    
-    # Notify the Patient
-    await send_notification(
-        db=db,
-        user_id=current_user.id,
-        title="Appointment Requested",
-        message=f"Your request with Dr. {doctor.user.full_name} is pending confirmation.",
-        notification_type="INFO"
-    )
-    
-    # Notify the Doctor
-    await send_notification(
-        db=db,
-        user_id=doctor.user_id,
-        title="New Booking Request",
-        message=f"A patient has requested an appointment on {booking_data.appointment_date} at {clean_time}.",
-        notification_type="INFO"
-    )
+
+    notification_dispatcher.wake()
+    slot_engine.mark_booked(doctor.id, new_appointment.appointment_date, new_appointment.appointment_time)
     
     return {"message": "Appointment booked successfully", "appointment_id": new_appointment.id}
 
 #route to get booked slots for a doctor on a specific date
 @router.get("/booked", response_model=List[str])
+@query_budget(1)
 async def get_booked_slots(
+    request: Request,
     doctor_id: UUID = Query(...),
     date: date = Query(...),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    # Booking pages poll this: always revalidate, but an unchanged day is just a 304
+    start, end = slot_engine.horizon()
+    if start <= date <= end:
+        # Served from the slot engine's occupancy (a query only when it is cold). The ETag comes from the
+        # day's version counter, so a poll for an unchanged day is a 304 without a query or a body
+        occupancy = await slot_engine.get_doctor(db, doctor_id)
+        if occupancy is None:
+            return cached_json(request, [], cache_control="no-cache")
+        etag = make_etag(doctor_id, date, occupancy.loaded_at, occupancy.versions.get(date, 0))
+        booked = [t.strftime("%H:%M") for t in occupancy.booked_on(date)]
+        return cached_json(request, booked, cache_control="no-cache", etag=etag)
+
+    # Outside the engine's horizon (past days, far future): straight from the database
     result = await db.execute(
         select(Appointment.appointment_time)
         .where(Appointment.doctor_id == doctor_id)
@@ -164,62 +188,74 @@ async def get_booked_slots(
 
     times = result.scalars().all()
 
-    # Convert time objects to "HH:MM"
-    return [t.strftime("%H:%M") for t in times]
+    # Convert time objects to "HH:MM", sorted so the same bookings always give the same ETag
+    booked = sorted(t.strftime("%H:%M") for t in times)
+    return cached_json(request, booked, cache_control="no-cache")
 
 # Get All Appointments for User(Patient/Doctor)
+# Newest first. With 'limit' (or a cursor) it is paged: the cursor for the next page comes back in the
+# X-Next-Cursor header. Without either it is the whole history, which is what the current client expects.
 @router.get("/", response_model=List[AppointmentResponse])
+@query_budget(3)
 async def get_my_appointments(
+    response: Response,
+    statuses: Optional[List[AppointmentStatus]] = Query(None, alias="status", description="Only these statuses (repeatable)"),
+    date_from: Optional[date] = Query(None, description="Earliest appointment date (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Latest appointment date (inclusive)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Items per page (50 when only a cursor is sent)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # AUTO-UPDATE PAST APPOINTMENTS
-    now = datetime.now()
-    today_date = now.date()
-    current_time = now.time()
-
-    await db.execute(
-        update(Appointment)
-        .where(
-            Appointment.status == "CONFIRMED",
-            or_(
-                Appointment.appointment_date < today_date,
-                and_(
-                    Appointment.appointment_date == today_date,
-                    Appointment.appointment_time < current_time
-                )
-            )
-        )
-        .values(status="COMPLETED")
-    )
-    await db.commit()
-
+    if limit is None and cursor:
+        limit = 50
+    # Read-only: past CONFIRMED appointments are completed by the background sweeper (app.services.sweeper)
     # DOCTOR LOGIC
     if current_user.role == "doctor":
-        query_doctor = await db.execute(select(Doctor).where(Doctor.user_id == current_user.id))
-        doctor = query_doctor.scalars().first()
+        query_doctor = await db.execute(select(Doctor.id).where(Doctor.user_id == current_user.id))
+        doctor_id = query_doctor.scalars().first()
         
-        if not doctor:
+        if not doctor_id:
             return []
 
-        query = await db.execute(
-            select(Appointment)
-            .where(Appointment.doctor_id == doctor.id)
-            .order_by(desc(Appointment.appointment_date), desc(Appointment.appointment_time))
-        )
-        return query.scalars().all()
+        query = select(Appointment).where(Appointment.doctor_id == doctor_id)
 
     # PATIENT LOGIC (The Default for everyone else)
     else:
-        query = await db.execute(
-            select(Appointment)
-            .where(Appointment.patient_id == current_user.id)
-            .order_by(desc(Appointment.appointment_date), desc(Appointment.appointment_time))
+        query = select(Appointment).where(Appointment.patient_id == current_user.id)
+
+    # FILTERS
+    if statuses:
+        query = query.where(Appointment.status.in_(statuses))
+    if date_from:
+        query = query.where(Appointment.appointment_date >= date_from)
+    if date_to:
+        query = query.where(Appointment.appointment_date <= date_to)
+
+    # KEYSET: continue right after the last row of the previous page
+    sort_key = tuple_(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+    if cursor:
+        last_key = tuple(decode_cursor(cursor, date.fromisoformat, time.fromisoformat, UUID))
+        query = query.where(sort_key < last_key)
+
+    query = query.order_by(desc(Appointment.appointment_date), desc(Appointment.appointment_time), desc(Appointment.id))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    result = await db.execute(query)
+    appointments = list(result.scalars().all())
+
+    if limit is not None and len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.appointment_date.isoformat(), last.appointment_time.isoformat(), last.id
         )
-        return query.scalars().all()
+
+    return appointments
 
 # Get All Unapproved Appointments for Doctor
 @router.get("/pendingAppointments", response_model=List[AppointmentResponse])
+@query_budget(4)
 async def get_my_pending_appointments(
     current_user: User = Depends(verify_doctor),
     db: AsyncSession = Depends(get_db)
@@ -246,6 +282,7 @@ async def get_my_pending_appointments(
 
 # Update Appointment Status
 @router.put("/{appointment_id}/status", response_model=AppointmentResponse)
+@query_budget(9)
 async def update_appointment_status(
     appointment_id: UUID,
     update_data: AppointmentUpdate,
@@ -326,42 +363,45 @@ async def update_appointment_status(
 
     # Apply Update
     appointment.status = update_data.status
+
+    # Queue the notification in the same transaction as the status change
+    # If the PATIENT cancelled it, tell the doctor
+    if appointment.patient_id == current_user.id:
+        notification = NotificationCreate(
+            user_id=appointment.doctor.user_id,
+            title="Appointment Cancelled",
+            message=f"A patient cancelled their slot on {appointment.appointment_date}.",
+            notification_type="WARNING"
+        )
+
+    # If the DOCTOR changed it (Confirmed or Rejected), tell the patient
+    elif update_data.status == "CONFIRMED":
+        link_text = f" Join here: {meeting_link}" if meeting_link else ""
+        notification = NotificationCreate(
+            user_id=appointment.patient_id,
+            title="Appointment Confirmed!",
+            message=f"Great news! Your appointment with Dr. {appointment.doctor.user.full_name} on {appointment.appointment_date} is confirmed. Join this link {link_text} at your booked slot",
+            notification_type="SUCCESS"
+        )
+    elif update_data.status == "REJECTED":
+        notification = NotificationCreate(
+            user_id=appointment.patient_id,
+            title="Appointment Declined",
+            message=f"Your appointment request for {appointment.appointment_date} could not be accepted.",
+            notification_type="WARNING"
+        )
+    else:
+        notification = None
+
+    if notification:
+        await queue_notifications(db, [notification])
     
     await db.commit()
     await db.refresh(appointment)
+    notification_dispatcher.wake()
 
-    # If the PATIENT cancelled it
-    if appointment.patient_id == current_user.id and update_data.status == "CANCELLED":
-        # We need the doctor's user_id to notify them
-        query_doc = await db.execute(select(Doctor).where(Doctor.id == appointment.doctor_id))
-        doc_record = query_doc.scalars().first()
-        if doc_record:
-            await send_notification(
-                db=db,
-                user_id=doc_record.user_id,
-                title="Appointment Cancelled",
-                message=f"A patient cancelled their slot on {appointment.appointment_date}.",
-                notification_type="WARNING"
-            )
-
-    # If the DOCTOR changed it (Confirmed or Rejected)
-    elif 'doctor_record' in locals() and appointment.doctor_id == doctor_record.id:
-        if update_data.status == "CONFIRMED":
-            link_text = f" Join here: {meeting_link}" if meeting_link else ""
-            await send_notification(
-                db=db,
-                user_id=appointment.patient_id,
-                title="Appointment Confirmed!",
-                message=f"Great news! Your appointment with Dr. {appointment.doctor.user.full_name} on {appointment.appointment_date} is confirmed. Join this link {link_text} at your booked slot",
-                notification_type="SUCCESS"
-            )
-        elif update_data.status == "REJECTED":
-            await send_notification(
-                db=db,
-                user_id=appointment.patient_id,
-                title="Appointment Declined",
-                message=f"Your appointment request for {appointment.appointment_date} could not be accepted.",
-                notification_type="WARNING"
-            )
+    # Cancelled/Rejected appointments free their slot again
+    if update_data.status in ["CANCELLED", "REJECTED"]:
+        slot_engine.mark_released(appointment.doctor_id, appointment.appointment_date, appointment.appointment_time)
     
     return appointment
\ No newline at end of file
@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.request_metrics import query_budget
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password
+from app.core.security import create_access_token, password_hasher
 from app.services.user import get_user_by_email
 from app.schemas.token import Token
 from app.core.config import settings
@@ -13,6 +14,7 @@ router = APIRouter()
 
 # Manual User Login
 @router.post("/login", response_model=Token)
+@query_budget(1)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -27,7 +29,7 @@ async def login_for_access_token(
         )
     
     # Verify password
-    if not verify_password(form_data.password, user.password_hash):
+    if not await password_hasher.verify(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -1,25 +1,39 @@
-from fastapi import APIRouter, Depends, Query, UploadFile, File, Form, HTTPException, status
-from app.services.notification import send_notification
+from fastapi import APIRouter, Depends, Query, Request, UploadFile, File, Form, HTTPException, status
+from app.core.request_metrics import query_budget
+from app.services.media_cleanup import media_cleanup, queue_media_cleanup
+from app.services.notification import queue_notifications
+from app.services.outbox import notification_dispatcher
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from datetime import time
+from sqlalchemy import select
+from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.exc import IntegrityError
 
 from app.models.availability import DoctorAvailability
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.doctor import Doctor
-from app.core.cloudinary_utils import delete_file, upload_file
-from app.schemas.doctor import AvailabilityCreate, DoctorAvailabilityRead, DoctorResponse
+from app.core.config import settings
+from app.core.http_cache import cached_json, make_etag
+from app.core.pagination import decode_cursor, encode_cursor
+from app.schemas.notification import NotificationCreate
+from app.schemas.doctor import AvailabilityCreate, DaySlots, DoctorAvailabilityRead, DoctorResponse, EarliestSlot
+from app.services.directory import LISTED_DOCTOR_CONDITIONS, doctor_directory
+from app.services.search import doctor_search_query
+from app.services.storage import media_storage
+from app.services.slots import earliest_free_slots, format_minute, slot_engine
 
 router = APIRouter()
 
+# Public directory data: shared caches may keep it briefly, then revalidate with the ETag
+PUBLIC_CACHE_CONTROL = f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE_SECONDS}, must-revalidate"
+
 # Apply for Doctor
 @router.post("/apply", status_code=status.HTTP_201_CREATED)
+@query_budget(8)
 async def apply_for_doctor(
     # We use Form(...) because we are sending a file along with text
     specialization: str = Form(...),
@@ -42,7 +56,7 @@ async def apply_for_doctor(
         )
     
     # Upload the file to Cloudinary
-    degree_url = upload_file(degree_file)
+    degree_url = await media_storage.upload(degree_file)
     if not degree_url:
         raise HTTPException(status_code=500, detail="Failed to upload degree file")
 
@@ -59,41 +73,46 @@ async def apply_for_doctor(
     
     db.add(new_doctor)
 
+    # Notifications are saved in the same transaction as the application
+    admin_query = await db.execute(select(User.id).where(User.role == "admin"))
+    admin_ids = admin_query.scalars().all()
+
+    notifications = [
+        NotificationCreate(
+            user_id=admin_id,
+            title="New Doctor Application",
+            message=f"{current_user.full_name} has applied to be a {specialization}. Please review their credentials.",
+            notification_type="INFO"
+        )
+        for admin_id in admin_ids
+    ]
+    notifications.append(
+        NotificationCreate(
+            user_id=current_user.id,
+            title="Application Received",
+            message="We have successfully received your doctor application. Our team will review it shortly.",
+            notification_type="SUCCESS"
+        )
+    )
+    await queue_notifications(db, notifications)
+
     try:
         await db.commit()
         await db.refresh(new_doctor)
     except IntegrityError:
         await db.rollback() 
         
-        try:
-            delete_file(degree_url) 
-        except Exception as e:
-            print(f"Failed to clean up Cloudinary file: {e}")
+        # Nothing points to the uploaded file now, queue it for deletion
+        queue_media_cleanup(db, [degree_url])
+        await db.commit()
+        media_cleanup.wake()
 
         raise HTTPException(
             status_code=400, 
             detail="A doctor with this license number already exists in our system."
         )
-    
-    admin_query = await db.execute(select(User).where(User.role == "admin"))
-    admins = admin_query.scalars().all()
 
-    for admin in admins:
-        await send_notification(
-            db=db,
-            user_id=admin.id,
-            title="New Doctor Application",
-            message=f"{current_user.full_name} has applied to be a {specialization}. Please review their credentials.",
-            notification_type="INFO"
-        )
-        
-    await send_notification(
-        db=db,
-        user_id=current_user.id,
-        title="Application Received",
-        message="We have successfully received your doctor application. Our team will review it shortly.",
-        notification_type="SUCCESS"
-    )
+    notification_dispatcher.wake()
     
     return {
         "message": "Application submitted successfully",
@@ -102,6 +121,7 @@ async def apply_for_doctor(
 
 # Set Doctor Availability
 @router.post("/availability")
+@query_budget(6)
 async def set_availability(
     availability_data: AvailabilityCreate,
     current_user: User = Depends(get_current_user),
@@ -162,6 +182,10 @@ async def set_availability(
         new_days.append(day)
 
     await db.commit()
+
+    # Working hours changed, drop the cached occupancy so the next lookup rebuilds it
+    slot_engine.invalidate(doctor.id)
+    await doctor_directory.refresh_doctor(db, current_user.id)
     
     return {
         "message": f"Availability set for {len(new_days)} days",
@@ -169,51 +193,86 @@ async def set_availability(
     }
 
 # Get All Doctors
+# Two ways to page: ?page=N (classic, OFFSET) or ?cursor=... (keyset, every page costs the same as page 1)
 @router.get("/")
+@query_budget(3)
 async def get_all_doctors(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(6, ge=1, le=100, description="Items per page"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
+    last_id = None
+    if cursor:
+        (last_id,) = decode_cursor(cursor, UUID)
     offset = (page - 1) * limit
-    conditions = [User.is_verified == True, User.is_active == True]
-
-    # Fetch total count
-    count_query = (
-        select(func.count())
-        .select_from(Doctor)
-        .join(Doctor.user)
-        .where(*conditions)
-    )
-    total_count_result = await db.execute(count_query)
-    total_doctors = total_count_result.scalar()
 
-    query = (
-        select(Doctor)
-        .join(Doctor.user)
-        .where(*conditions)
-        .options(selectinload(Doctor.user))
-        .offset(offset)
-        .limit(limit)
-    )
-    
-    result = await db.execute(query)
-    verified_doctors = result.scalars().all()
+    # Fetch one extra row to know whether there is a next page
+    if settings.DOCTOR_DIRECTORY_IN_MEMORY:
+        directory = await doctor_directory.snapshot()
+        # Unchanged directory -> same ETag, answered with a 304 before building the page
+        etag = make_etag(directory.digest, page, limit, cursor)
+        last_modified = directory.modified_at
+        total_doctors = len(directory.listed)
+        verified_doctors = [entry.doctor for entry in directory.page_after(last_id, offset, limit + 1)]
+    else:
+        etag = last_modified = None
+        # Total comes from the directory's cached counter, not a COUNT(*) per request
+        total_doctors = await doctor_directory.total(db)
+
+        query = (
+            select(Doctor)
+            .join(Doctor.user)
+            .where(*LISTED_DOCTOR_CONDITIONS)
+            .options(selectinload(Doctor.user))
+            .order_by(Doctor.id)
+        )
+        query = query.where(Doctor.id > last_id) if last_id else query.offset(offset)
+        result = await db.execute(query.limit(limit + 1))
+        verified_doctors = [DoctorResponse.model_validate(doctor) for doctor in result.scalars().all()]
+
+    next_cursor = None
+    if len(verified_doctors) > limit:
+        verified_doctors = verified_doctors[:limit]
+        next_cursor = encode_cursor(verified_doctors[-1].id)
     
-    return {
-        "total": total_doctors,
-        "page": page,
-        "limit": limit,
-        "total_pages": (total_doctors + limit - 1) // limit, 
-        "data": verified_doctors
-    }
+    return cached_json(
+        request,
+        {
+            "total": total_doctors,
+            "page": page,
+            "limit": limit,
+            "total_pages": (total_doctors + limit - 1) // limit, 
+            "next_cursor": next_cursor,
+            "data": verified_doctors
+        },
+        cache_control=PUBLIC_CACHE_CONTROL,
+        etag=etag,
+        last_modified=last_modified,
+    )
 
 # Get availability of a particular doctor
 @router.get("/{doctor_id}/availability", response_model=List[DoctorAvailabilityRead])
+@query_budget(6)
 async def get_doctor_availability(
     doctor_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # Verified doctors are all in the directory snapshot, only misses need the database
+    if settings.DOCTOR_DIRECTORY_IN_MEMORY:
+        directory = await doctor_directory.snapshot()
+        entry = directory.entries.get(doctor_id)
+        if entry is not None:
+            return cached_json(
+                request,
+                entry.availability,
+                cache_control=PUBLIC_CACHE_CONTROL,
+                etag=make_etag(entry.digest),
+                last_modified=directory.modified_at,
+            )
+
     # Check if the doctor exists
     query_doc = await db.execute(select(Doctor).where(Doctor.id == doctor_id).options(selectinload(Doctor.user)))
     doctor = query_doc.scalars().first()
@@ -231,12 +290,81 @@ async def get_doctor_availability(
     query_avail = await db.execute(
         select(DoctorAvailability).where(DoctorAvailability.doctor_id == doctor_id)
     )
-    schedule = query_avail.scalars().all()
+    schedule = [DoctorAvailabilityRead.model_validate(slot) for slot in query_avail.scalars().all()]
     
+    return cached_json(request, schedule, cache_control=PUBLIC_CACHE_CONTROL)
+
+# Get free slots of a particular doctor over a date range
+@router.get("/{doctor_id}/slots", response_model=List[DaySlots])
+@query_budget(1)
+async def get_doctor_free_slots(
+    doctor_id: UUID,
+    start_date: Optional[date] = Query(None, description="First day to look at (defaults to today)"),
+    days: int = Query(14, ge=1, le=settings.SLOT_HORIZON_DAYS, description="Number of days to return"),
+    slot_minutes: int = Query(30, ge=5, le=240, description="Slot length in minutes"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Returns every free slot for the range in a single call, e.g.
+    [{ "date": "2026-03-02", "slots": ["09:00", "09:30"] }, ...]
+    """
+    occupancy = await slot_engine.get_doctor(db, doctor_id)
+
+    if not occupancy:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+    if not occupancy.is_verified:
+        raise HTTPException(
+            status_code=403, 
+            detail="This doctor is not verified yet. Availability cannot be viewed."
+        )
+
+    now = datetime.now()
+    first_day = max(start_date or now.date(), now.date())
+    last_day = first_day + timedelta(days=days - 1)
+
+    if last_day > occupancy.loaded_to:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Slots can only be looked up {settings.SLOT_HORIZON_DAYS} days ahead."
+        )
+
+    # Group the chronological stream of free slots by day
+    schedule = [{"date": first_day + timedelta(days=i), "slots": []} for i in range(days)]
+    for day, minute in occupancy.iter_free(first_day, days, slot_minutes, now):
+        schedule[(day - first_day).days]["slots"].append(format_minute(minute))
+
     return schedule
 
+# Earliest open slots across every doctor of a specialization
+@router.get("/earliest-slots", response_model=List[EarliestSlot])
+@query_budget(1)
+async def get_earliest_slots(
+    specialization: str = Query(..., min_length=1, description="e.g. Cardiologist"),
+    limit: int = Query(10, ge=1, le=100, description="Number of slots to return"),
+    days: int = Query(14, ge=1, le=settings.SLOT_HORIZON_DAYS, description="How many days ahead to search"),
+    slot_minutes: int = Query(30, ge=5, le=240, description="Slot length in minutes"),
+    db: AsyncSession = Depends(get_db)
+):
+    doctors = await slot_engine.get_specialization(db, specialization)
+
+    now = datetime.now()
+    slots = earliest_free_slots(doctors, now.date(), days, slot_minutes, now, limit)
+
+    return [
+        {
+            "doctor_id": entry.doctor_id,
+            "doctor_name": entry.full_name,
+            "specialization": entry.specialization,
+            "date": day,
+            "time": format_minute(minute),
+        }
+        for day, minute, entry in slots
+    ]
+
 # Get Doctor's Professional Profile
 @router.get("/me", response_model=DoctorResponse)
+@query_budget(3)
 async def get_doctor_profile_me(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -263,26 +391,26 @@ async def get_doctor_profile_me(
     return doctor
 
 # Search Doctor by Name/Specialization
+# Ranked by relevance, paginated when "limit" is sent; results stop at SEARCH_MAX_RESULTS either way
 @router.get("/search", response_model=List[DoctorResponse])
+@query_budget(2)
 async def search_doctors(
-    name: Optional[str] = Query(None, description="Search by doctor's full name"),
-    specialization: Optional[str] = Query(None, description="Filter by specialization (e.g., Dentist)"),
-    db: AsyncSession = Depends(get_db)
+    name: Optional[str] = Query(None, max_length=100, description="Search by doctor's full name"),
+    specialization: Optional[str] = Query(None, max_length=100, description="Filter by specialization (e.g., Dentist)"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Items per page (all results when omitted)"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # BASE QUERY: Join User model so we can check verification AND search by name
-    query = select(Doctor).join(Doctor.user).where(User.is_verified == True)
-    
-    # DYNAMIC FILTERS
-    if name:
-        # Searches the connected User table for the doctor's name
-        query = query.where(User.full_name.ilike(f"%{name}%"))
-        
-    if specialization:
-        # Searches the Doctor table for their field of medicine
-        query = query.where(Doctor.specialization.ilike(f"%{specialization}%"))
+    # Without a limit: every match in one response (up to SEARCH_MAX_RESULTS), as the client expects
+    if limit is None:
+        limit = settings.SEARCH_MAX_RESULTS
+    offset = (page - 1) * limit
+    if offset >= settings.SEARCH_MAX_RESULTS:
+        return []
+    limit = min(limit, settings.SEARCH_MAX_RESULTS - offset)
 
-    # Execute and load the nested user relationship to get name, email, etc.
-    query = query.options(selectinload(Doctor.user))
+    # Always the database: the GIN trigram indexes find matches without looking at every doctor
+    query = doctor_search_query(name, specialization).offset(offset).limit(limit)
     result = await db.execute(query)
     
     return result.scalars().all()
\ No newline at end of file
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.request_metrics import query_budget
+from app.core.media_backends import LocalBackend
+from app.services.storage import media_storage
+
+# Only mounted when MEDIA_BACKEND is "local" (see main.py)
+router = APIRouter()
+
+# Serve a stored file
+# FileResponse streams from disk (sendfile when the server supports it) and answers Range requests
+@router.get("/{folder}/{name}")
+@query_budget(0)
+async def get_media_file(folder: str, name: str):
+    backend = media_storage.backend
+    path = backend.path_for(folder, name) if isinstance(backend, LocalBackend) else None
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Names start with the content hash and are never reused: a URL always returns the same bytes
+    content_hash = name.split("-", 1)[0].split(".", 1)[0]
+    return FileResponse(path, headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{content_hash}"',
+    })
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from typing import List
+from sqlalchemy import select, desc, tuple_, update
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.request_metrics import query_budget
+from app.core.database import get_db, get_read_db
+from app.core.pagination import decode_cursor, encode_cursor
 from app.core.ws_manager import manager
 from app.models.notification import Notification
-from app.schemas.notification import NotificationResponse
+from app.schemas.notification import MarkReadRequest, MarkReadResponse, NotificationPage, NotificationResponse, UnreadCountResponse
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.services.unread_counter import unread_counter
 
 router = APIRouter()
 
@@ -21,20 +25,25 @@ async def websocket_endpoint(websocket: WebSocket, user_id: UUID):
     Note: Standard browser WebSockets can't send Auth Headers easily, 
     so passing the user_id (or a secure token) in the URL is standard practice.
     """
-    await manager.connect(websocket, user_id)
+    connection = await manager.connect(websocket, user_id)
     try:
         while True:
-            # Keeps the connection open listening for client messages (if any)
+            # Keeps the connection open listening for client messages (heartbeat "pong"s)
             data = await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(user_id)
+            connection.touch()
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the manager already closed this socket (idle / too slow)
+        pass
+    finally:
+        manager.disconnect(connection)
 
 
 # GET ALL NOTIFICATIONS (Historical Data)
 @router.get("/", response_model=List[NotificationResponse])
+@query_budget(2)
 async def get_my_notifications(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> List[Notification]:
     """Fetch all past notifications for the logged-in user."""
     query = await db.execute(
@@ -46,8 +55,106 @@ async def get_my_notifications(
     return list(query.scalars().all())
 
 
+def _feed_cursor(notification: Notification) -> str:
+    return encode_cursor(notification.created_at.isoformat(), notification.id)
+
+def _aware_datetime(value: str) -> datetime:
+    # created_at is a timestamptz, a naive value would be compared in the server's time zone
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        raise ValueError("cursor timestamp has no time zone")
+    return parsed
+
+def _feed_position(cursor: str):
+    return tuple(decode_cursor(cursor, _aware_datetime, UUID))
+
+
+# NOTIFICATION FEED (Cursor-paginated history, read and unread)
+@router.get("/feed", response_model=NotificationPage)
+@query_budget(2)
+async def get_notification_feed(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    unread_only: bool = Query(False),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Newest first. Each page costs the same no matter how deep you scroll."""
+    query = select(Notification).where(Notification.user_id == current_user.id)
+
+    if unread_only:
+        query = query.where(Notification.is_read == False)
+
+    if cursor:
+        query = query.where(tuple_(Notification.created_at, Notification.id) < _feed_position(cursor))
+
+    # Fetch one extra row to know whether there is a next page
+    result = await db.execute(
+        query
+        .order_by(desc(Notification.created_at), desc(Notification.id))
+        .limit(limit + 1)
+    )
+    items = list(result.scalars().all())
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _feed_cursor(items[-1])
+
+    head_cursor = _feed_cursor(items[0]) if items else None
+
+    return {"items": items, "next_cursor": next_cursor, "head_cursor": head_cursor}
+
+
+# UNREAD COUNT (Header badge)
+@router.get("/unread-count", response_model=UnreadCountResponse)
+@query_budget(2)
+async def get_unread_count(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return {"unread": await unread_counter.get(db, current_user.id)}
+
+
+# MARK MANY AS READ
+@router.patch("/read", response_model=MarkReadResponse)
+@query_budget(2)
+async def mark_notifications_as_read(
+    payload: MarkReadRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Clears a list of notifications, everything up to a feed position, or everything - in one UPDATE."""
+    if payload.ids is not None and payload.up_to_cursor is not None:
+        raise HTTPException(status_code=400, detail="Send either ids or up_to_cursor, not both.")
+
+    statement = (
+        update(Notification)
+        .where(Notification.user_id == current_user.id)
+        .where(Notification.is_read == False)
+    )
+
+    if payload.ids is not None:
+        if not payload.ids:
+            return {"updated": 0, "ids": []}
+        statement = statement.where(Notification.id.in_(payload.ids))
+    elif payload.up_to_cursor is not None:
+        statement = statement.where(
+            tuple_(Notification.created_at, Notification.id) <= _feed_position(payload.up_to_cursor)
+        )
+
+    result = await db.execute(statement.values(is_read=True).returning(Notification.id))
+    updated_ids = list(result.scalars().all())
+    await db.commit()
+
+    unread_counter.mark_read(current_user.id, len(updated_ids))
+
+    return {"updated": len(updated_ids), "ids": updated_ids}
+
+
 # MARK AS READ
 @router.patch("/{notification_id}/read", response_model=NotificationResponse)
+@query_budget(4)
 async def mark_notification_as_read(
     notification_id: UUID,
     current_user: User = Depends(get_current_user),
@@ -62,8 +169,12 @@ async def mark_notification_as_read(
     if notification.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    was_unread = not notification.is_read
     notification.is_read = True
     await db.commit()
     await db.refresh(notification)
+
+    if was_unread:
+        unread_counter.mark_read(current_user.id)
     
     return notification
\ No newline at end of file
@@ -7,12 +7,15 @@ from datetime import timedelta
 import string
 import secrets
 
-from app.core.cloudinary_utils import upload_file, delete_file
+from app.core.request_metrics import query_budget
 from app.core.database import get_db
 from app.core.security import create_access_token
 from app.schemas.user import ContactCreate, UserCreate, UserResponse
 from app.schemas.token import GoogleTokenRequest
-from app.services.user import create_user, get_user_by_email 
+from app.services.directory import doctor_directory
+from app.services.media_cleanup import media_cleanup, queue_media_cleanup
+from app.services.storage import media_storage
+from app.services.user import create_user, get_user_by_email, invalidate_cached_user
 from app.models.user import User
 from app.dependencies import get_current_user
 from app.core.config import settings
@@ -22,6 +25,7 @@ router = APIRouter()
 GOOGLE_CLIENT_ID = settings.GOOGLE_CLIENT_ID
 
 @router.post("/google")
+@query_budget(3)
 async def google_auth(request: GoogleTokenRequest, db: AsyncSession = Depends(get_db)):
     try:
         # Verify the token with Google's servers
@@ -69,6 +73,7 @@ async def google_auth(request: GoogleTokenRequest, db: AsyncSession = Depends(ge
 
 # Register User
 @router.post("/register", response_model=UserResponse)
+@query_budget(3)
 async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if email already exists
     db_user = await get_user_by_email(db, email=user.email)
@@ -80,11 +85,13 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 # Get User Profile
 @router.get("/me", response_model=UserResponse)
+@query_budget(1)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 # Update User Profile
 @router.put("/me", response_model=UserResponse)
+@query_budget(7)
 async def update_user_profile(
     full_name: Optional[str] = Form(None),
     phone_number: Optional[str] = Form(None),
@@ -104,26 +111,31 @@ async def update_user_profile(
         
     # Upload and update profile picture if provided
     if profile_picture:
-        # Delete old pic if it exists and isn't the default blank avatar
-        if current_user.profile_picture and "pixabay.com" not in current_user.profile_picture:
-            delete_file(current_user.profile_picture)
-            
         # Upload the new one to the specific folder
-        image_url = upload_file(profile_picture, folder="medhelp_profiles")
+        image_url = await media_storage.upload(profile_picture, folder="medhelp_profiles")
         
         if not image_url:
             raise HTTPException(status_code=500, detail="Failed to upload profile picture")
+
+        # Queue the old pic for deletion if it exists and isn't the default blank avatar (saved with the new one)
+        if current_user.profile_picture and "pixabay.com" not in current_user.profile_picture:
+            queue_media_cleanup(db, [current_user.profile_picture])
             
         current_user.profile_picture = image_url
 
     # Save to database
     await db.commit()
     await db.refresh(current_user)
+    media_cleanup.wake()
+    await invalidate_cached_user(current_user.email)
+    if current_user.role == "doctor":
+        await doctor_directory.refresh_doctor(db, current_user.id)
     
     return current_user
 
 # Contact Us Route
 @router.post("/contact")
+@query_budget(0)
 async def submit_contact_form(contact_data: ContactCreate):
     """
     Accepts queries from the public 'Contact Us' form.
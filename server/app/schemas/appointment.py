@@ -8,9 +8,11 @@ class AppointmentCreate(BaseModel):
     appointment_date: date  # Format: YYYY-MM-DD
     appointment_time: time
     appointment_type: Literal["IN_PERSON", "VIRTUAL"] = "IN_PERSON"
+AppointmentStatus = Literal["PENDING", "CONFIRMED", "CANCELLED", "REJECTED", "COMPLETED"]
+
 # Schema for Updating Status (For Doctors/Admin)
 class AppointmentUpdate(BaseModel):
-    status: Literal["PENDING", "CONFIRMED", "CANCELLED", "REJECTED", "COMPLETED"]
+    status: AppointmentStatus
 
 # Nested schemas to show simple details about the other person
 class DoctorInfo(BaseModel):
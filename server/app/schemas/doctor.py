@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-from datetime import time
+from datetime import date, time
 from uuid import UUID
 from app.schemas.user import UserResponse 
 
@@ -36,4 +36,15 @@ class DoctorAvailabilityRead(BaseModel):
     start_time: time
     end_time: time
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class DaySlots(BaseModel):
+    date: date
+    slots: List[str]  # ["09:00", "09:30", ...]
+
+class EarliestSlot(BaseModel):
+    doctor_id: UUID
+    doctor_name: str
+    specialization: str
+    date: date
+    time: str  # "HH:MM"
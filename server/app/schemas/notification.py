@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Literal
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -18,4 +18,23 @@ class NotificationResponse(BaseModel):
     is_read: bool
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+    head_cursor: Optional[str] = None  # position of the first item, use as up_to_cursor to mark everything seen
+
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+# Schema for PATCH /notifications/read
+# Give either ids, or up_to_cursor (everything at or older than that feed position).
+# Leave both empty to mark everything as read.
+class MarkReadRequest(BaseModel):
+    ids: Optional[List[UUID]] = None
+    up_to_cursor: Optional[str] = None
+
+class MarkReadResponse(BaseModel):
+    updated: int
+    ids: List[UUID]
\ No newline at end of file
@@ -0,0 +1,222 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.doctor import Doctor
+from app.models.user import User
+from app.schemas.doctor import DoctorAvailabilityRead, DoctorResponse
+
+# Who shows up in the public doctor directory
+LISTED_DOCTOR_CONDITIONS = [User.is_verified == True, User.is_active == True]
+
+
+class DirectoryEntry:
+    """One verified doctor, already in response shape."""
+
+    __slots__ = ("id", "doctor", "availability", "listed", "digest")
+
+    def __init__(self, doctor: Doctor):
+        self.id = doctor.id
+        self.doctor = DoctorResponse.model_validate(doctor)
+        self.availability = [DoctorAvailabilityRead.model_validate(slot) for slot in doctor.availabilities]
+        self.listed = bool(doctor.user.is_active)
+
+        # Changes whenever anything this entry serves changes, used for HTTP validators
+        digest = hashlib.sha1(self.doctor.model_dump_json().encode())
+        for slot in self.availability:
+            digest.update(slot.model_dump_json().encode())
+        self.digest = digest.hexdigest()
+
+
+class DirectorySnapshot:
+    """
+    Immutable view of every verified doctor. Changes build a new snapshot and swap it in,
+    so a request that already holds one never sees it change under its feet.
+    """
+
+    def __init__(self, entries: Dict[UUID, DirectoryEntry], version: int, built_at: Optional[float] = None):
+        self.entries = entries
+        self.version = version
+        self.built_at = built_at if built_at is not None else time.monotonic()
+        # Listing order is by id, so keyset cursors are a bisect away
+        self.listed = sorted((entry for entry in entries.values() if entry.listed), key=lambda entry: entry.id)
+        self.listed_ids = [entry.id for entry in self.listed]
+
+        # Content digest: identical data gives the identical digest, on every worker
+        digest = hashlib.sha1()
+        for entry_id in sorted(entries):
+            digest.update(entries[entry_id].digest.encode())
+        self.digest = digest.hexdigest()
+        # Set by DoctorDirectory: when the content last actually changed
+        self.modified_at: Optional[datetime] = None
+
+    def page_after(self, last_id: Optional[UUID], offset: int, limit: int) -> List[DirectoryEntry]:
+        start = bisect.bisect_right(self.listed_ids, last_id) if last_id is not None else offset
+        return self.listed[start:start + limit]
+
+
+def _build_snapshot(doctors: List[Doctor], version: int) -> DirectorySnapshot:
+    # Runs in a worker thread: the rows are fully loaded (no lazy loads), only CPU work is left
+    return DirectorySnapshot({doctor.id: DirectoryEntry(doctor) for doctor in doctors}, version)
+
+
+def _doctor_query():
+    return (
+        select(Doctor)
+        .join(Doctor.user)
+        .where(User.is_verified == True)
+        .options(selectinload(Doctor.user), selectinload(Doctor.availabilities))
+        # Sessions don't expire on commit, make sure we read what was just saved
+        .execution_options(populate_existing=True)
+    )
+
+
+class DoctorDirectory:
+    """
+    Process-local, versioned snapshot of the public doctor directory
+    (verified doctors, their display fields and weekly availability).
+    - A doctor being verified or editing their profile / availability calls refresh_doctor(): only that entry is reloaded
+    - A deleted doctor is dropped with remove_doctor()
+    - The TTL bounds how stale another worker's copy can get, since updates are per process
+    Building and patching a snapshot is CPU work proportional to the directory size, so it runs in a thread.
+    Search doesn't use the snapshot, it goes to the database (GIN trigram indexes, see app.services.search).
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+        # Digest and time of the last published content, so a rebuild with no changes keeps its Last-Modified
+        self._last_digest: Optional[str] = None
+        self._last_modified = datetime.now(timezone.utc)
+
+        # Listed total for the database path (DOCTOR_DIRECTORY_IN_MEMORY=false), counted once per TTL
+        self._total: Optional[int] = None
+        self._counted_at = 0.0
+
+        self.rebuilds = 0
+        self.patches = 0
+
+    def _stamp(self, snapshot: DirectorySnapshot):
+        if snapshot.digest != self._last_digest:
+            self._last_digest = snapshot.digest
+            self._last_modified = datetime.now(timezone.utc)
+        snapshot.modified_at = self._last_modified
+
+    def _is_fresh(self, snapshot: Optional[DirectorySnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - snapshot.built_at <= self.ttl_seconds
+        )
+
+    async def snapshot(self) -> DirectorySnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            # Another request may have rebuilt it while we waited
+            if self._is_fresh(self._snapshot):
+                return self._snapshot
+
+            version = self._version
+            # Always from the primary: a lagging replica would be cached for the whole TTL
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(_doctor_query())
+                doctors = result.scalars().all()
+            snapshot = await asyncio.to_thread(_build_snapshot, doctors, version)
+            self._stamp(snapshot)
+            self.rebuilds += 1
+
+            # Only keep it if nothing was invalidated during the load, otherwise the next read tries again
+            if version == self._version:
+                self._snapshot = snapshot
+            return snapshot
+
+    async def total(self, db: AsyncSession) -> int:
+        """Listed doctors, for the database path. Counted once and reused until a change or the TTL."""
+        if self._total is None or time.monotonic() - self._counted_at > self.ttl_seconds:
+            result = await db.execute(
+                select(func.count())
+                .select_from(Doctor)
+                .join(Doctor.user)
+                .where(*LISTED_DOCTOR_CONDITIONS)
+            )
+            self._total = result.scalar()
+            self._counted_at = time.monotonic()
+        return self._total
+
+    async def refresh_doctor(self, db: AsyncSession, user_id: UUID):
+        """Re-reads one doctor (by their user id) into the current snapshot, after they changed their data."""
+        self._total = None
+        snapshot = self._snapshot
+        if not self._is_fresh(snapshot):
+            return  # Nothing cached (or already stale), the next read rebuilds anyway
+
+        result = await db.execute(_doctor_query().where(Doctor.user_id == user_id))
+        doctor = result.scalars().first()
+        await self._patch(snapshot, user_id, DirectoryEntry(doctor) if doctor is not None else None)
+
+    async def remove_doctor(self, user_id: UUID):
+        """Drops a deleted doctor from the current snapshot, no query needed."""
+        self._total = None
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            await self._patch(snapshot, user_id, None)
+
+    async def _patch(self, snapshot: DirectorySnapshot, user_id: UUID, entry: Optional[DirectoryEntry]):
+        entries = {entry_id: other for entry_id, other in snapshot.entries.items() if other.doctor.user_id != user_id}
+        if entry is not None:
+            entries[entry.id] = entry
+        if len(entries) == len(snapshot.entries) and entry is None:
+            return  # wasn't listed, nothing changes
+
+        # Patches keep the original build time, the TTL still bounds what other workers may have missed
+        patched = await asyncio.to_thread(DirectorySnapshot, entries, snapshot.version + 1, snapshot.built_at)
+
+        # A rebuild or another patch may have happened while we were reading / building
+        if self._snapshot is snapshot and self._is_fresh(snapshot):
+            self._version = patched.version
+            self._stamp(patched)
+            self._snapshot = patched
+            self.patches += 1
+        else:
+            self.invalidate()  # can't tell which one is newer, let the next read rebuild
+
+    def invalidate(self):
+        self._version += 1
+        self._snapshot = None
+        self._total = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": settings.DOCTOR_DIRECTORY_IN_MEMORY,
+            "version": self._version,
+            "digest": snapshot.digest if snapshot else None,
+            "cached": snapshot is not None,
+            "doctors": len(snapshot.entries) if snapshot else 0,
+            "cached_total": self._total,
+            "listed": len(snapshot.listed) if snapshot else 0,
+            "age_seconds": round(time.monotonic() - snapshot.built_at, 1) if snapshot else None,
+            "ttl_seconds": self.ttl_seconds,
+            "rebuilds": self.rebuilds,
+            "patches": self.patches,
+        }
+
+
+# Create a single global instance to use across app
+doctor_directory = DoctorDirectory(ttl_seconds=settings.DOCTOR_DIRECTORY_TTL_SECONDS)
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.core.config import settings
+from app.core.database import replica_router
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _csv_value(value) -> str:
+    return "" if value is None else str(value)
+
+async def _export_chunks(query: Select, columns: List[str], fmt: ExportFormat) -> AsyncIterator[str]:
+    """
+    Streams rows through a server-side cursor, one chunk of 'EXPORT_CHUNK_SIZE' rows at a time,
+    so memory stays flat whatever the table size.
+    The session is opened here (not via Depends) because it has to outlive the route function.
+    Exports are read-only, so they go to a replica when one is healthy.
+    """
+    async with replica_router.session() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue()
+
+        async for rows in result.partitions():
+            buffer = io.StringIO()
+            if fmt == "csv":
+                writer = csv.writer(buffer)
+                for row in rows:
+                    writer.writerow([_csv_value(value) for value in row])
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+def stream_export(query: Select, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    columns = [column.key for column in query.selected_columns]
+    return StreamingResponse(
+        _export_chunks(query, columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,224 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select, text, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.doctor import Doctor
+from app.models.media import MediaCleanup
+from app.models.user import User
+from app.services.storage import media_storage
+
+# Folders our uploads go to (see the upload() calls in the routers)
+MEDIA_FOLDERS = ("medhelp_degrees", "medhelp_profiles")
+
+# Any constant works, it just has to be the same in every worker
+RECONCILE_LOCK_KEY = 74_012
+
+
+def queue_media_cleanup(db: AsyncSession, urls: Iterable[Optional[str]]):
+    """
+    Adds delete jobs for these files to the session WITHOUT committing.
+    Call it in the transaction that drops the reference, then media_cleanup.wake() after the commit.
+    """
+    for url in urls:
+        if url:
+            db.add(MediaCleanup(url=url))
+
+
+class MediaCleanupWorker:
+    """
+    Background task that drains the media cleanup queue.
+    - Picks up a batch with FOR UPDATE SKIP LOCKED and deletes the files concurrently (through media_storage)
+    - Failed deletes are retried with exponential backoff, then given up on (reconciliation catches them later)
+    - Every 'reconcile_interval' seconds one worker compares stored files with the database
+      and counts the ones nothing references anymore (orphans); with 'delete_orphans' it queues them too
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float, max_attempts: int, retry_base: float,
+                 reconcile_interval: float, orphan_grace: float, delete_orphans: bool):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.reconcile_interval = reconcile_interval
+        self.orphan_grace = orphan_grace
+        self.delete_orphans = delete_orphans
+
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_reconcile = 0.0
+
+        self.deleted = 0
+        self.retried = 0
+        self.dropped = 0
+        self.orphans_found = 0
+        self.last_reconciled_at: Optional[datetime] = None
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.reconcile_interval and loop.time() >= self._next_reconcile:
+                self._next_reconcile = loop.time() + self.reconcile_interval
+                try:
+                    await self.reconcile()
+                except Exception as e:
+                    print(f"Media reconciliation error: {e}")
+
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                print(f"Media cleanup error: {e}")
+                processed = 0
+
+            # A full batch means there is probably more waiting, go again immediately
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def process_batch(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(MediaCleanup)
+                .where(MediaCleanup.available_at <= func.now())
+                .order_by(MediaCleanup.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = result.scalars().all()
+            if not jobs:
+                return 0
+
+            # A file can be referenced again by the time we get to it (e.g. a job queued by reconciliation
+            # for a URL that was written back since): those jobs are dropped, not executed.
+            # New uploads can't reuse a queued file, every upload gets a unique name
+            urls = {job.url for job in jobs}
+            in_use = set((await db.execute(
+                select(User.profile_picture).where(User.profile_picture.in_(urls))
+                .union(select(Doctor.degree_upload_url).where(Doctor.degree_upload_url.in_(urls)))
+            )).scalars().all())
+
+            outcomes = await asyncio.gather(
+                *(media_storage.remove(job.url) for job in jobs if job.url not in in_use),
+                return_exceptions=True
+            )
+            outcomes = iter(outcomes)
+
+            now = datetime.now(timezone.utc)
+            finished_ids = []
+            for job in jobs:
+                if job.url in in_use:
+                    finished_ids.append(job.id)
+                    continue
+
+                outcome = next(outcomes)
+                if not isinstance(outcome, Exception):
+                    finished_ids.append(job.id)
+                    self.deleted += 1
+                    continue
+
+                job.attempts += 1
+                if job.attempts >= self.max_attempts:
+                    print(f"Media cleanup: giving up on {job.url} after {job.attempts} attempts: {outcome!r}")
+                    finished_ids.append(job.id)
+                    self.dropped += 1
+                else:
+                    job.available_at = now + timedelta(seconds=self.retry_base * 2 ** job.attempts)
+                    job.last_error = repr(outcome)[:500]
+                    self.retried += 1
+
+            if finished_ids:
+                await db.execute(delete(MediaCleanup).where(MediaCleanup.id.in_(finished_ids)))
+            await db.commit()
+
+            return len(jobs)
+
+    async def reconcile(self) -> int:
+        """
+        Finds stored files that no user or doctor row points to and, with 'delete_orphans', queues them.
+        Returns how many were found.
+        """
+        # A session-level advisory lock belongs to a connection, so keep the same one for the whole run
+        async with engine.connect() as conn:
+            locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RECONCILE_LOCK_KEY})).scalar()
+            await conn.commit()
+            if not locked:
+                return 0
+
+            try:
+                # Listing first: a reference committed while we list is still seen by the query below
+                stored = []
+                for folder in MEDIA_FOLDERS:
+                    stored.extend(await media_storage.list_files(folder))
+
+                referenced = union(
+                    select(User.profile_picture.label("url")).where(User.profile_picture.is_not(None)),
+                    select(Doctor.degree_upload_url).where(Doctor.degree_upload_url.is_not(None)),
+                    select(MediaCleanup.url),
+                )
+                known = set((await conn.execute(referenced)).scalars().all())
+
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.orphan_grace)
+                orphans = [url for url, created_at in stored if created_at < cutoff and url not in known]
+                if orphans and self.delete_orphans:
+                    await conn.execute(MediaCleanup.__table__.insert(), [{"url": url, "attempts": 0} for url in orphans])
+                elif orphans:
+                    print(f"Media reconciliation: {len(orphans)} orphaned files (dry run, MEDIA_RECONCILE_DELETE is off)")
+                await conn.commit()
+            finally:
+                # A failed statement leaves the transaction aborted, and the unlock would fail with it
+                # (keeping the lock until the pooled connection is closed), so end the transaction first
+                await conn.rollback()
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RECONCILE_LOCK_KEY})
+                await conn.commit()
+
+        self.orphans_found += len(orphans)
+        self.last_reconciled_at = datetime.now()
+        if orphans and self.delete_orphans:
+            self.wake()
+        return len(orphans)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "deleted": self.deleted,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "orphans_found": self.orphans_found,
+            "delete_orphans": self.delete_orphans,
+            "last_reconciled_at": self.last_reconciled_at.isoformat() if self.last_reconciled_at else None,
+        }
+
+
+# Create a single global instance to use across app
+media_cleanup = MediaCleanupWorker(
+    batch_size=settings.MEDIA_CLEANUP_BATCH_SIZE,
+    poll_interval=settings.MEDIA_CLEANUP_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.MEDIA_CLEANUP_MAX_ATTEMPTS,
+    retry_base=settings.MEDIA_CLEANUP_RETRY_BASE_SECONDS,
+    reconcile_interval=settings.MEDIA_RECONCILE_INTERVAL_SECONDS,
+    orphan_grace=settings.MEDIA_ORPHAN_GRACE_SECONDS,
+    delete_orphans=settings.MEDIA_RECONCILE_DELETE,
+)
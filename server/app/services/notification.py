@@ -1,29 +1,30 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import UUID
+from typing import List
 from app.models.notification import Notification
-from app.core.ws_manager import manager
-from app.schemas.notification import NotificationResponse
+from app.models.outbox import NotificationOutbox
+from app.schemas.notification import NotificationCreate
 
-async def send_notification(
+async def queue_notifications(
     db: AsyncSession,
-    user_id: UUID,
-    title: str,
-    message: str,
-    notification_type: str
-):
-    # 1. Save it permanently to the database
-    new_notification = Notification(
-        user_id=user_id,
-        title=title,
-        message=message,
-        notification_type=notification_type
-    )
-    db.add(new_notification)
-    await db.commit()
-    await db.refresh(new_notification)
+    notifications: List[NotificationCreate]
+) -> List[Notification]:
+    """
+    Inserts the notifications and their outbox entries in the session's transaction WITHOUT committing.
+    Call it before the route's own commit so the business change and its notifications
+    are saved (or rolled back) together, then call notification_dispatcher.wake().
+    Two statements whatever the batch size: one INSERT ... RETURNING, one outbox INSERT.
+    """
+    if not notifications:
+        return []
 
-    # 2. Convert the SQLAlchemy model into a clean JSON dictionary
-    notif_data = NotificationResponse.model_validate(new_notification).model_dump(mode='json')
-    
-    # 3. Push it directly to the user if they are currently online!
-    await manager.send_personal_message(notif_data, user_id)
\ No newline at end of file
+    result = await db.scalars(
+        insert(Notification).returning(Notification),
+        [notification.model_dump() for notification in notifications]
+    )
+    queued = list(result.all())
+    await db.execute(
+        insert(NotificationOutbox),
+        [{"notification_id": notification.id} for notification in queued]
+    )
+    return queued
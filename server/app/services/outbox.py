@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.ws_manager import manager
+from app.models.notification import Notification
+from app.models.outbox import NotificationOutbox
+from app.schemas.notification import NotificationResponse
+from app.services.unread_counter import unread_counter
+
+
+class NotificationDispatcher:
+    """
+    Background task that drains the notification outbox.
+    - Picks up a batch with FOR UPDATE SKIP LOCKED, so several workers can run it side by side
+    - Pushes the whole batch concurrently. A push fails when the cross-worker relay does
+      (ConnectionManager.send_personal_message raises), those are retried with exponential backoff
+    - Requests call wake() after committing so delivery starts right away instead of at the next poll
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float, max_attempts: int, retry_base: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.delivered = 0
+        self.retried = 0
+        self.dropped = 0
+        self.lag_seconds = 0.0      # age of the oldest entry in the last batch
+        self.max_lag_seconds = 0.0
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.dispatch_batch()
+            except Exception as e:
+                print(f"Notification dispatcher error: {e}")
+                processed = 0
+
+            # A full batch means there is probably more waiting, go again immediately
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def dispatch_batch(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(NotificationOutbox, Notification)
+                .join(Notification, Notification.id == NotificationOutbox.notification_id)
+                .where(NotificationOutbox.available_at <= func.now())
+                .order_by(NotificationOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True, of=NotificationOutbox)
+            )
+            rows = result.all()
+            if not rows:
+                return 0
+
+            # These notifications are committed, cached badge counts for their users are now stale
+            unread_counter.invalidate({notification.user_id for _, notification in rows})
+
+            now = datetime.now(timezone.utc)
+            self.lag_seconds = max((now - entry.created_at).total_seconds() for entry, _ in rows)
+            self.max_lag_seconds = max(self.max_lag_seconds, self.lag_seconds)
+
+            outcomes = await asyncio.gather(
+                *(
+                    manager.send_personal_message(
+                        NotificationResponse.model_validate(notification).model_dump(mode='json'),
+                        notification.user_id
+                    )
+                    for _, notification in rows
+                ),
+                return_exceptions=True
+            )
+
+            finished_ids = self.settle([entry for entry, _ in rows], outcomes, now)
+            if finished_ids:
+                await db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(finished_ids)))
+            await db.commit()
+
+            return len(rows)
+
+    def settle(self, entries: List[NotificationOutbox], outcomes: list, now: datetime) -> List[int]:
+        """
+        Books the push results: returns the ids of the entries that are done (delivered, or out of attempts)
+        and reschedules the others with exponential backoff.
+        """
+        finished_ids = []
+        for entry, outcome in zip(entries, outcomes):
+            if not isinstance(outcome, Exception):
+                finished_ids.append(entry.id)
+                self.delivered += 1
+                continue
+
+            entry.attempts += 1
+            entry.last_error = str(outcome)[:500]
+            if entry.attempts >= self.max_attempts:
+                # The notification itself stays in the feed, we only give up on the live push
+                finished_ids.append(entry.id)
+                self.dropped += 1
+            else:
+                entry.available_at = now + timedelta(seconds=self.retry_base * 2 ** entry.attempts)
+                self.retried += 1
+        return finished_ids
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+
+# Create a single global instance to use across app
+notification_dispatcher = NotificationDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    retry_base=settings.OUTBOX_RETRY_BASE_SECONDS,
+)
@@ -0,0 +1,42 @@
+from typing import Optional
+
+from sqlalchemy import Float, Select, literal, or_, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import func
+
+from app.models.doctor import Doctor
+from app.models.user import User
+
+
+def contains_pattern(term: str) -> str:
+    # ILIKE pattern for "contains term", with the user's own % and _ taken literally (use with escape="\\")
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _match(column, term: str):
+    """
+    Matches a substring (ILIKE) or a close spelling (pg_trgm word similarity, e.g. "cardiolgist").
+    Both operators are served by the column's GIN trigram index, so no sequential scan.
+    """
+    return or_(column.ilike(contains_pattern(term), escape="\\"), column.op("%>")(term))
+
+
+def doctor_search_query(name: Optional[str], specialization: Optional[str]) -> Select:
+    """Verified doctors matching the search, best match first (ties broken by id so pages are stable)."""
+    query = select(Doctor).join(Doctor.user).where(User.is_verified == True)
+    score = literal(0.0, type_=Float)
+
+    if name:
+        query = query.where(_match(User.full_name, name))
+        score = score + func.word_similarity(name, User.full_name)
+
+    if specialization:
+        query = query.where(_match(Doctor.specialization, specialization))
+        score = score + func.word_similarity(specialization, Doctor.specialization)
+
+    return (
+        query
+        .options(selectinload(Doctor.user))
+        .order_by(score.desc(), Doctor.id)
+    )
@@ -0,0 +1,291 @@
+import heapq
+import time as clock
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Boolean, Date, String, Time, cast, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.appointment import Appointment
+from app.models.availability import DoctorAvailability
+from app.models.doctor import Doctor
+from app.models.user import User
+from app.services.search import contains_pattern
+
+# Appointments in these states occupy their slot
+ACTIVE_STATUSES = ("PENDING", "CONFIRMED")
+
+
+def minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class DoctorOccupancy:
+    """
+    Compact view of one doctor's calendar.
+    - rules: weekly working windows, e.g. {"Monday": [(540, 1020)]} in minutes of the day
+    - booked: one integer bitmap per date, bit N is set when an active appointment starts at minute N
+    - booked_times: the exact start times behind the bitmap. Several bookings can start within the same
+      minute (e.g. 09:00:00 and 09:00:30), so releasing one only clears the bit when none is left
+    - versions: bumped on every change to a day's bookings, a cheap validator for HTTP caching
+    """
+
+    def __init__(self, doctor_id: UUID, full_name: str, specialization: str, is_verified: bool,
+                 loaded_from: date, loaded_to: date):
+        self.doctor_id = doctor_id
+        self.full_name = full_name
+        self.specialization = specialization
+        self.is_verified = is_verified
+        self.rules: Dict[str, List[Tuple[int, int]]] = {}
+        self.booked: Dict[date, int] = {}
+        self.booked_times: Dict[date, Set[time]] = {}
+        self.versions: Dict[date, int] = {}
+        self.loaded_from = loaded_from
+        self.loaded_to = loaded_to
+        self.loaded_at = clock.monotonic()
+
+    def add_rule(self, day_name: str, start_time: time, end_time: time):
+        window = (minute_of_day(start_time), minute_of_day(end_time))
+        windows = self.rules.setdefault(day_name, [])
+        if window not in windows:
+            windows.append(window)
+
+    def set_booked(self, day: date, t: time, booked: bool = True):
+        # Keyed by exact time, like uq_doctor_active_slot, so marking the same booking twice is harmless
+        minute = minute_of_day(t)
+        times = self.booked_times.setdefault(day, set())
+        self.versions[day] = self.versions.get(day, 0) + 1
+        if booked:
+            times.add(t)
+            self.booked[day] = self.booked.get(day, 0) | (1 << minute)
+        else:
+            times.discard(t)
+            if not any(minute_of_day(other) == minute for other in times):
+                self.booked[day] = self.booked.get(day, 0) & ~(1 << minute)
+
+    def booked_on(self, day: date) -> List[time]:
+        return sorted(self.booked_times.get(day, ()))
+
+    def free_minutes(self, day: date, slot_minutes: int, not_before: int = 0) -> List[int]:
+        """
+        Start minutes of every free slot on a given day, in order.
+        A slot is free when no active appointment starts inside [start, start + slot_minutes).
+        """
+        occupied = self.booked.get(day, 0)
+        mask = (1 << slot_minutes) - 1
+        free = set()
+
+        for start, end in self.rules.get(day.strftime("%A"), []):
+            minute = start
+            while minute + slot_minutes <= end:
+                if minute >= not_before and not (occupied >> minute) & mask:
+                    free.add(minute)
+                minute += slot_minutes
+
+        return sorted(free)
+
+    def iter_free(self, start_day: date, days: int, slot_minutes: int, now: datetime) -> Iterator[Tuple[date, int]]:
+        """Walk free slots chronologically, skipping anything that already started."""
+        for offset in range(days):
+            day = start_day + timedelta(days=offset)
+            not_before = _next_bookable_minute(now) if day == now.date() else 0
+            for minute in self.free_minutes(day, slot_minutes, not_before):
+                yield day, minute
+
+
+def _next_bookable_minute(now: datetime) -> int:
+    # Booking rejects times earlier than "now", so round the current time up to the next whole minute
+    minute = now.hour * 60 + now.minute
+    return minute + 1 if (now.second or now.microsecond) else minute
+
+
+def _occupancy_query(doctor_filters: list, start: date, end: date):
+    """
+    Loads doctor profile, weekly availability and active bookings in ONE round trip.
+    Both halves of the UNION share the same column layout, 'kind' tells them apart.
+    """
+    profiles = (
+        select(
+            literal("doctor", String).label("kind"),
+            Doctor.id.label("doctor_id"),
+            User.full_name.label("full_name"),
+            Doctor.specialization.label("specialization"),
+            User.is_verified.label("is_verified"),
+            DoctorAvailability.days_of_week.label("day_name"),
+            cast(null(), Date).label("on_date"),
+            DoctorAvailability.start_time.label("start_time"),
+            DoctorAvailability.end_time.label("end_time"),
+        )
+        .select_from(Doctor)
+        .join(Doctor.user)
+        .outerjoin(DoctorAvailability, DoctorAvailability.doctor_id == Doctor.id)
+        .where(*doctor_filters)
+    )
+
+    matching_doctors = select(Doctor.id).join(Doctor.user).where(*doctor_filters)
+    bookings = (
+        select(
+            literal("booked", String),
+            Appointment.doctor_id,
+            cast(null(), String),
+            cast(null(), String),
+            cast(null(), Boolean),
+            cast(null(), String),
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            cast(null(), Time),
+        )
+        .where(Appointment.doctor_id.in_(matching_doctors))
+        .where(Appointment.appointment_date.between(start, end))
+        .where(Appointment.status.in_(ACTIVE_STATUSES))
+    )
+
+    return union_all(profiles, bookings)
+
+
+class SlotEngine:
+    """
+    Process-local cache of DoctorOccupancy objects.
+    Cold lookups cost a single query, warm lookups are served from memory until the TTL expires.
+    Writes in this process patch the bitmaps directly (mark_booked / mark_released / invalidate),
+    the TTL bounds staleness caused by other workers.
+    """
+
+    def __init__(self, ttl_seconds: int, horizon_days: int):
+        self.ttl_seconds = ttl_seconds
+        self.horizon_days = horizon_days
+        self._doctors: Dict[UUID, DoctorOccupancy] = {}
+        # "cardiologist" -> (loaded_at, [doctor ids]), the precomputed specialization index
+        self._specializations: Dict[str, Tuple[float, List[UUID]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def horizon(self) -> Tuple[date, date]:
+        today = date.today()
+        return today, today + timedelta(days=self.horizon_days)
+
+    def _is_fresh(self, entry: DoctorOccupancy, until: date) -> bool:
+        return entry.loaded_to >= until and clock.monotonic() - entry.loaded_at < self.ttl_seconds
+
+    async def load(self, db: AsyncSession, doctor_filters: list) -> List[DoctorOccupancy]:
+        """Rebuilds occupancy for every doctor matching the filters and stores it in the cache."""
+        start, end = self.horizon()
+        result = await db.execute(_occupancy_query(doctor_filters, start, end))
+
+        loaded: Dict[UUID, DoctorOccupancy] = {}
+        bookings = []
+        for row in result:
+            if row.kind == "booked":
+                bookings.append(row)
+                continue
+
+            entry = loaded.get(row.doctor_id)
+            if entry is None:
+                entry = DoctorOccupancy(
+                    row.doctor_id, row.full_name, row.specialization, row.is_verified, start, end
+                )
+                loaded[row.doctor_id] = entry
+            if row.day_name and row.start_time is not None and row.end_time is not None:
+                entry.add_rule(row.day_name, row.start_time, row.end_time)
+
+        for row in bookings:
+            entry = loaded.get(row.doctor_id)
+            if entry:
+                entry.set_booked(row.on_date, row.start_time)
+
+        self._doctors.update(loaded)
+        return list(loaded.values())
+
+    async def get_doctor(self, db: AsyncSession, doctor_id: UUID) -> Optional[DoctorOccupancy]:
+        _, until = self.horizon()
+        entry = self._doctors.get(doctor_id)
+        if entry and self._is_fresh(entry, until):
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        loaded = await self.load(db, [Doctor.id == doctor_id])
+        if not loaded:
+            self._doctors.pop(doctor_id, None)
+            return None
+        return loaded[0]
+
+    async def get_specialization(self, db: AsyncSession, specialization: str) -> List[DoctorOccupancy]:
+        """Occupancy of every verified, active doctor whose specialization matches."""
+        _, until = self.horizon()
+        key = specialization.strip().lower()
+
+        cached = self._specializations.get(key)
+        if cached and clock.monotonic() - cached[0] < self.ttl_seconds:
+            entries = [self._doctors.get(doctor_id) for doctor_id in cached[1]]
+            if all(entry and self._is_fresh(entry, until) for entry in entries):
+                self.hits += 1
+                return entries
+
+        self.misses += 1
+        loaded = await self.load(db, [
+            User.is_verified == True,
+            User.is_active == True,
+            Doctor.specialization.ilike(contains_pattern(key), escape="\\"),
+        ])
+        self._specializations[key] = (clock.monotonic(), [entry.doctor_id for entry in loaded])
+        return loaded
+
+    def mark_booked(self, doctor_id: UUID, day: date, t: time):
+        entry = self._doctors.get(doctor_id)
+        if entry and entry.loaded_from <= day <= entry.loaded_to:
+            entry.set_booked(day, t, True)
+
+    def mark_released(self, doctor_id: UUID, day: date, t: time):
+        entry = self._doctors.get(doctor_id)
+        if entry and entry.loaded_from <= day <= entry.loaded_to:
+            entry.set_booked(day, t, False)
+
+    def invalidate(self, doctor_id: Optional[UUID] = None):
+        if doctor_id is None:
+            self._doctors.clear()
+        else:
+            self._doctors.pop(doctor_id, None)
+
+    def invalidate_specializations(self):
+        """Call when the verified doctor set changes (verify / reject / delete)."""
+        self._specializations.clear()
+
+    def stats(self) -> dict:
+        return {
+            "doctors": len(self._doctors),
+            "specializations": len(self._specializations),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _tagged_free(entry: DoctorOccupancy, start_day: date, days: int, slot_minutes: int, now: datetime):
+    for day, minute in entry.iter_free(start_day, days, slot_minutes, now):
+        yield day, minute, entry
+
+
+def earliest_free_slots(doctors: List[DoctorOccupancy], start_day: date, days: int, slot_minutes: int,
+                        now: datetime, limit: int) -> List[Tuple[date, int, DoctorOccupancy]]:
+    """
+    N earliest free slots across many doctors.
+    Each doctor yields its slots lazily in order, heapq.merge keeps only one pending slot per doctor,
+    so we stop as soon as 'limit' slots are found instead of expanding every calendar.
+    """
+    streams = [_tagged_free(entry, start_day, days, slot_minutes, now) for entry in doctors]
+    merged = heapq.merge(*streams, key=lambda slot: (slot[0], slot[1]))
+    return list(islice(merged, limit))
+
+
+# Create a single global instance to use across app
+slot_engine = SlotEngine(
+    ttl_seconds=settings.SLOT_CACHE_TTL_SECONDS,
+    horizon_days=settings.SLOT_HORIZON_DAYS,
+)
@@ -0,0 +1,137 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+from app.core.media_backends import StorageBackend, create_storage_backend
+
+
+class MediaStorage:
+    """
+    Async front for the (blocking) storage backend, Cloudinary or local disk (see app.core.media_backends).
+    - Calls run in a small dedicated thread pool, so a slow upload never freezes the event loop
+    - Every call has a timeout; the route gets None (upload) or a logged failure (delete) instead of hanging
+    - Uploads are size checked on the spooled UploadFile and streamed from it, never read into memory here
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        timeout_seconds: float,
+        max_upload_bytes: int,
+        backend: StorageBackend,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_upload_bytes = max_upload_bytes
+        self.backend = backend
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="media")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    async def _run(self, fn, *args, timed: bool = True):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        # A slot is one pool thread, so holding it means the call starts right away and the timeout
+        # only covers the call itself. The thread can't be interrupted: on timeout the request moves on,
+        # but the slot stays taken until the thread is really done, or later calls would time out queued behind it
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds if timed else None)
+
+    def _release(self, future: asyncio.Future):
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # retrieved, so a timed-out call's error isn't reported as never retrieved
+
+    def _check_size(self, file: UploadFile):
+        size = file.size
+        if size is None:
+            # Measure the spooled file without reading it
+            file.file.seek(0, os.SEEK_END)
+            size = file.file.tell()
+        file.file.seek(0)
+
+        if size > self.max_upload_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File is too large. The limit is {self.max_upload_bytes // (1024 * 1024)} MB."
+            )
+
+    async def upload(self, file: UploadFile, folder: str = "medhelp_degrees") -> Optional[str]:
+        """Returns the file's URL, or None if the upload failed or timed out."""
+        self._check_size(file)
+        try:
+            url = await self._run(self.backend.upload, file, folder)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"Upload to '{folder}' timed out after {self.timeout_seconds}s")
+            return None
+        except Exception as e:
+            self.failures += 1
+            print(f"Upload to '{folder}' failed: {e}")
+            return None
+
+        if not url:
+            self.failures += 1
+        return url
+
+    async def remove(self, url: str):
+        """Deletes a stored file, raising on failure or timeout (used by the cleanup queue, which retries)."""
+        if url:
+            await self._run(self.backend.delete, url)
+
+    async def delete(self, url: str):
+        """Best-effort delete: failures are logged, not raised."""
+        try:
+            await self.remove(url)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"Deleting {url} timed out after {self.timeout_seconds}s")
+        except Exception as e:
+            self.failures += 1
+            print(f"Deleting {url} failed: {e}")
+
+    async def list_files(self, folder: str) -> List[Tuple[str, datetime]]:
+        """
+        (url, created_at) of every file stored in a folder.
+        No timeout: on a large account the listing is many Admin API pages, it takes as long as it takes.
+        """
+        return await self._run(self.backend.list_files, folder, timed=False)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+# Create a single global instance to use across app
+media_storage = MediaStorage(
+    max_concurrency=settings.MEDIA_UPLOAD_CONCURRENCY,
+    timeout_seconds=settings.MEDIA_TIMEOUT_SECONDS,
+    max_upload_bytes=settings.MAX_UPLOAD_BYTES,
+    backend=create_storage_backend(settings.MEDIA_BACKEND, settings.MEDIA_LOCAL_ROOT, settings.MEDIA_LOCAL_BASE_URL),
+)
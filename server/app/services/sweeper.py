@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, text, update
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.appointment import Appointment
+
+# Any constant works, it just has to be the same in every worker
+SWEEP_LOCK_KEY = 74_011
+
+
+class AppointmentSweeper:
+    """
+    Marks CONFIRMED appointments whose time has passed as COMPLETED.
+    - Runs in the background every 'interval' seconds instead of on every GET /appointments/
+    - Holds a Postgres advisory lock while sweeping, so only one worker does it at a time
+    - Updates at most 'batch_size' rows per transaction to keep row locks short
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+        self.completed = 0
+        self.runs = 0
+        self.skipped = 0  # another worker held the lock
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Appointment sweeper error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> int:
+        # A session-level advisory lock belongs to a connection, so keep the same one for the whole sweep
+        async with engine.connect() as conn:
+            locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SWEEP_LOCK_KEY})).scalar()
+            await conn.commit()
+            if not locked:
+                self.skipped += 1
+                return 0
+
+            try:
+                total = 0
+                while True:
+                    now = datetime.now()
+                    due = (
+                        select(Appointment.id)
+                        .where(
+                            Appointment.status == "CONFIRMED",
+                            or_(
+                                Appointment.appointment_date < now.date(),
+                                and_(
+                                    Appointment.appointment_date == now.date(),
+                                    Appointment.appointment_time < now.time()
+                                )
+                            )
+                        )
+                        .order_by(Appointment.appointment_date, Appointment.appointment_time)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                    result = await conn.execute(
+                        update(Appointment)
+                        .where(Appointment.id.in_(due))
+                        .values(status="COMPLETED")
+                    )
+                    await conn.commit()
+
+                    total += result.rowcount
+                    if result.rowcount < self.batch_size:
+                        break
+            finally:
+                # A failed statement leaves the transaction aborted, and the unlock would fail with it
+                # (keeping the lock until the pooled connection is closed), so end the transaction first
+                await conn.rollback()
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SWEEP_LOCK_KEY})
+                await conn.commit()
+
+        self.runs += 1
+        self.completed += total
+        self.last_run_at = datetime.now()
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+# Create a single global instance to use across app
+appointment_sweeper = AppointmentSweeper(
+    interval=settings.APPOINTMENT_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.APPOINTMENT_SWEEP_BATCH_SIZE,
+)
@@ -0,0 +1,45 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable
+from uuid import UUID
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.notification import Notification
+
+class UnreadCounter:
+    """
+    Unread notification count per user for the header badge.
+    A miss is one COUNT(*) answered from the partial index on unread rows,
+    after that the number is kept in memory and adjusted as notifications are read.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self._counts = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    async def get(self, db: AsyncSession, user_id: UUID) -> int:
+        count = self._counts.get(user_id)
+        if count is None:
+            result = await db.execute(
+                select(func.count())
+                .select_from(Notification)
+                .where(Notification.user_id == user_id)
+                .where(Notification.is_read == False)
+            )
+            count = result.scalar()
+            self._counts.set(user_id, count)
+        return count
+
+    def mark_read(self, user_id: UUID, how_many: int = 1):
+        self._counts.update(user_id, lambda count: max(0, count - how_many))
+
+    def invalidate(self, user_ids: Iterable[UUID]):
+        # New notifications were committed, recount on the next read
+        for user_id in user_ids:
+            self._counts.pop(user_id)
+
+    def stats(self) -> dict:
+        return self._counts.stats()
+
+# Create a single global instance to use across app
+unread_counter = UnreadCounter(max_size=settings.UNREAD_COUNT_MAX_SIZE, ttl_seconds=settings.UNREAD_COUNT_TTL_SECONDS)
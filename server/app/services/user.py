@@ -1,19 +1,68 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.ws_manager import manager
+
+# Resolved principals, keyed by token subject (email).
+# We keep a plain snapshot of the columns, never the ORM object itself, so one request
+# can't leak state into another.
+user_cache = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+# Sent to the other workers (over the WebSocket fan-out channel) so they drop their copy too
+USER_INVALIDATED = "user_invalidated"
+
+# Bumped by every invalidation, here or from another worker. A cache miss only stores the row it read
+# if no invalidation happened in the meantime, or a read that started before it could put the stale row back
+_generation = 0
 
 # Get user by email (to check if they already exist)
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
+# Get user by email, served from the in-process cache when possible
+async def get_cached_user_by_email(db: AsyncSession, email: str):
+    snapshot = user_cache.get(email)
+    if snapshot is None:
+        generation = _generation
+        user = await get_user_by_email(db, email=email)
+        if user is not None and generation == _generation:
+            user_cache.set(email, {key: getattr(user, key) for key in _USER_COLUMNS})
+        return user
+
+    # Rebuild a "loaded" instance and attach it to this request's session without a query,
+    # so routes can still modify and commit current_user as usual
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+def _forget_cached_user(email: str):
+    global _generation
+    _generation += 1
+    user_cache.pop(email)
+
+# Call after anything that changes a user (profile, role, verification, deletion), once it is committed.
+# Every worker drops its copy; one that misses the event (fan-out down) serves it for at most USER_CACHE_TTL_SECONDS
+async def invalidate_cached_user(email: str):
+    _forget_cached_user(email)
+    try:
+        await manager.fanout.publish_event(USER_INVALIDATED, {"email": email})
+    except Exception as e:
+        print(f"Could not tell the other workers to drop cached user {email}: {e}")
+
+manager.fanout.subscribe(USER_INVALIDATED, lambda data: _forget_cached_user(data["email"]))
+
 # Create a new user
 async def create_user(db: AsyncSession, user: UserCreate):
 
     # Hash the password if it exists
-    hashed_password = get_password_hash(user.password) if user.password else None
+    hashed_password = await password_hasher.hash(user.password) if user.password else None
 
     # Convert Pydantic model to DB model
     db_user = User(
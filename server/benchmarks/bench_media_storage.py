@@ -0,0 +1,119 @@
+"""
+Upload / download throughput of the local media backend, on this machine's disk.
+
+- upload: concurrent uploads through MediaStorage (chunked, hashed writes into --root)
+- download: GET /media/{folder}/{name} through the real router (FileResponse), full files and Range requests
+
+    python -m benchmarks.bench_media_storage --files 200 --size-kb 1024 --concurrency 8
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import report, setup_env, summarize
+
+ROOT = tempfile.mkdtemp(prefix="medhelp-media-bench-")
+os.environ.setdefault("MEDIA_BACKEND", "local")
+os.environ.setdefault("MEDIA_LOCAL_ROOT", ROOT)
+os.environ.setdefault("MEDIA_LOCAL_BASE_URL", "http://bench/media")
+setup_env()
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, UploadFile  # noqa: E402
+
+from app.routers import media  # noqa: E402
+from app.services.storage import media_storage  # noqa: E402
+
+FOLDER = "benchmark"
+RANGE_BYTES = 64 * 1024
+
+
+def _throughput(total_bytes: int, elapsed: float) -> float:
+    return round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else 0.0
+
+
+async def _bounded(coros, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+async def main(args):
+    size = args.size_kb * 1024
+    media_storage.max_upload_bytes = size
+    rng = random.Random(7)
+    payloads = [rng.randbytes(size) for _ in range(args.files)]
+
+    # Upload
+    upload_latencies = []
+
+    async def upload(i: int):
+        file = UploadFile(io.BytesIO(payloads[i]), filename=f"file-{i}.bin", size=size)
+        t0 = time.perf_counter()
+        url = await media_storage.upload(file, FOLDER)
+        upload_latencies.append(time.perf_counter() - t0)
+        return url
+
+    started = time.perf_counter()
+    urls = await _bounded((upload(i) for i in range(args.files)), args.concurrency)
+    upload_elapsed = time.perf_counter() - started
+
+    # Download, through the ASGI app (no network, measures the app + disk side)
+    app = FastAPI()
+    app.include_router(media.router, prefix="/media")
+    paths = [url.replace("http://bench", "") for url in urls]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        download_latencies = []
+
+        async def download(path: str, headers: dict):
+            t0 = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            download_latencies.append(time.perf_counter() - t0)
+            return len(response.content)
+
+        started = time.perf_counter()
+        full_bytes = sum(await _bounded((download(path, {}) for path in paths), args.concurrency))
+        full_elapsed = time.perf_counter() - started
+        full_latencies, download_latencies = download_latencies, []
+
+        def random_range():
+            start = rng.randrange(0, max(1, size - RANGE_BYTES))
+            return {"Range": f"bytes={start}-{start + RANGE_BYTES - 1}"}
+
+        started = time.perf_counter()
+        range_bytes = sum(await _bounded((download(path, random_range()) for path in paths), args.concurrency))
+        range_elapsed = time.perf_counter() - started
+
+    results = {
+        "files": args.files,
+        "size_kb": args.size_kb,
+        "concurrency": args.concurrency,
+        "upload": {**summarize(upload_latencies, upload_elapsed), "mb_per_s": _throughput(size * args.files, upload_elapsed)},
+        "download_full": {**summarize(full_latencies, full_elapsed), "mb_per_s": _throughput(full_bytes, full_elapsed)},
+        "download_range": {
+            **summarize(download_latencies, range_elapsed),
+            "range_bytes": RANGE_BYTES,
+            "all_partial": range_bytes == RANGE_BYTES * args.files,
+        },
+    }
+    shutil.rmtree(ROOT, ignore_errors=True)
+    report("media_storage", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Slow media uploads vs. event loop responsiveness.
+
+Uses a fake storage backend that blocks for --latency seconds (like a slow Cloudinary call)
+and fires a burst of uploads while a probe coroutine plays the role of an unrelated endpoint.
+Compares calling the backend inline (the old behaviour) with the MediaStorage thread pool.
+
+    python -m benchmarks.bench_media_uploads --uploads 20 --latency 0.25 --concurrency 4
+"""
+import argparse
+import asyncio
+import io
+import time
+
+from benchmarks.common import report, setup_env, summarize
+
+setup_env()
+
+from fastapi import UploadFile  # noqa: E402
+
+from app.core.media_backends import StorageBackend  # noqa: E402
+from app.services.storage import MediaStorage  # noqa: E402
+
+PROBE_INTERVAL_S = 0.01
+
+
+class SlowBackend(StorageBackend):
+    name = "fake"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def upload(self, file: UploadFile, folder: str):
+        file.file.read()  # consume the stream like the SDK would
+        time.sleep(self.latency)
+        return f"https://media.example.com/{folder}/{file.filename}"
+
+
+async def _probe(stop: asyncio.Event, lateness: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lateness.append(time.perf_counter() - started - PROBE_INTERVAL_S)
+
+
+async def _run_burst(mode: str, args) -> dict:
+    backend = SlowBackend(args.latency)
+    storage = MediaStorage(
+        max_concurrency=args.concurrency,
+        timeout_seconds=args.latency * args.uploads + 5,
+        max_upload_bytes=args.size_kb * 1024,
+        backend=backend,
+    )
+    payload = b"x" * (args.size_kb * 1024)
+    stop = asyncio.Event()
+    lateness: list = []
+    upload_latencies: list = []
+
+    async def upload(i: int):
+        file = UploadFile(io.BytesIO(payload), filename=f"file-{i}.pdf")
+        started = time.perf_counter()
+        if mode == "inline":
+            backend.upload(file, "benchmark")
+        else:
+            await storage.upload(file, "benchmark")
+        upload_latencies.append(time.perf_counter() - started)
+
+    probe = asyncio.create_task(_probe(stop, lateness))
+    await asyncio.sleep(PROBE_INTERVAL_S * 5)  # let the probe settle
+
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(i) for i in range(args.uploads)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    return {
+        "uploads": summarize(upload_latencies, elapsed),
+        "unrelated_endpoint_delay": summarize(lateness, elapsed),
+    }
+
+
+async def main(args):
+    results = {"latency_s": args.latency, "size_kb": args.size_kb}
+    for mode in ("inline", "thread_pool"):
+        results[mode] = await _run_burst(mode, args)
+    report("media_uploads", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.25, help="Seconds each fake upload blocks")
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+Login burst vs. event loop responsiveness.
+
+Fires a burst of concurrent "logins" (a bcrypt verify each) while a probe coroutine
+plays the role of an unrelated endpoint and measures how late it gets scheduled.
+Compares hashing inline on the event loop with the PasswordHasher thread pool.
+
+    python -m benchmarks.bench_password_hashing --logins 40 --concurrency 4
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import report, setup_env, summarize
+
+setup_env()
+
+from app.core.security import PasswordHasher, get_password_hash, verify_password  # noqa: E402
+
+PROBE_INTERVAL_S = 0.01
+
+
+async def _probe(stop: asyncio.Event, lateness: list):
+    # Each iteration stands in for a cheap request on the same worker
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lateness.append(time.perf_counter() - started - PROBE_INTERVAL_S)
+
+
+async def _run_burst(mode: str, logins: int, concurrency: int, hashed: str) -> dict:
+    hasher = PasswordHasher(max_concurrency=concurrency)
+    stop = asyncio.Event()
+    lateness: list = []
+    login_latencies: list = []
+
+    async def login():
+        started = time.perf_counter()
+        if mode == "inline":
+            verify_password("benchmark-password", hashed)
+        else:
+            await hasher.verify("benchmark-password", hashed)
+        login_latencies.append(time.perf_counter() - started)
+
+    probe = asyncio.create_task(_probe(stop, lateness))
+    await asyncio.sleep(PROBE_INTERVAL_S * 5)  # let the probe settle
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    return {
+        "logins": summarize(login_latencies, elapsed),
+        "unrelated_endpoint_delay": summarize(lateness, elapsed),
+    }
+
+
+async def main(args):
+    hashed = get_password_hash("benchmark-password")
+    results = {}
+    for mode in ("inline", "thread_pool"):
+        results[mode] = await _run_burst(mode, args.logins, args.concurrency, hashed)
+    report("password_hashing", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    asyncio.run(main(parser.parse_args()))
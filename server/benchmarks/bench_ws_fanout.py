@@ -0,0 +1,106 @@
+"""
+ConnectionManager at scale, with in-memory fake sockets (no network involved).
+
+- memory: bytes allocated per open connection (queue + writer task + bookkeeping)
+- fan-out: time from send_personal_message() until every socket of the user got the message
+- slow consumer: a stalled socket must not slow the sender down
+
+    python -m benchmarks.bench_ws_fanout --connections 10000 --tabs 2 --messages 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+import uuid
+
+from benchmarks.common import report, setup_env, summarize
+
+setup_env()
+
+from app.core.ws_fanout import LocalFanout  # noqa: E402
+from app.core.ws_manager import ConnectionManager  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self, on_message=None, stall: bool = False):
+        self.on_message = on_message
+        self.stall = stall
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.stall:
+            await asyncio.Event().wait()  # never returns, like a client that stopped reading
+        if self.on_message:
+            self.on_message(message)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def main(args):
+    manager = ConnectionManager(LocalFanout(), queue_size=args.queue_size, heartbeat_interval=3600, idle_timeout=7200)
+    await manager.start()
+
+    users = [uuid.uuid4() for _ in range(args.connections // args.tabs)]
+    pending = {}  # message id -> [sent_at, sockets still waiting]
+    latencies = []
+
+    def received(message):
+        entry = pending[message["id"]]
+        entry[1] -= 1
+        if entry[1] == 0:
+            latencies.append(time.perf_counter() - entry[0])
+
+    # Memory per connection
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for user_id in users:
+        for _ in range(args.tabs):
+            await manager.connect(FakeWebSocket(received), user_id)
+    await asyncio.sleep(0)  # let the writer tasks start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    open_connections = manager.stats()["connections"]
+
+    # Fan-out latency
+    started = time.perf_counter()
+    for i in range(args.messages):
+        pending[i] = [time.perf_counter(), args.tabs]
+        await manager.send_personal_message({"id": i, "title": "Benchmark"}, random.choice(users))
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    while len(latencies) < args.messages:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    # Slow consumer: fill a stalled socket's queue, the sender must keep going and evict it
+    slow_user = uuid.uuid4()
+    await manager.connect(FakeWebSocket(stall=True), slow_user)
+    send_times = []
+    for i in range(args.queue_size * 2):
+        t0 = time.perf_counter()
+        await manager.send_personal_message({"id": -1, "title": "Benchmark"}, slow_user)
+        send_times.append(time.perf_counter() - t0)
+
+    results = {
+        "connections": open_connections,
+        "bytes_per_connection": round((after - before) / open_connections, 1),
+        "fanout": summarize(latencies, elapsed),
+        "slow_consumer_sends": summarize(send_times, sum(send_times)),
+        "evicted_slow": manager.stats()["evicted_slow"],
+    }
+    await manager.stop()
+    report("ws_fanout", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--tabs", type=int, default=2, help="Sockets per user")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    asyncio.run(main(parser.parse_args()))
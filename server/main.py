@@ -1,16 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.routers import users, auth, doctors, appointments, admin, notifications
+from app.core.database import replica_router
+from app.core.metrics import registry
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.ws_manager import manager
+from app.routers import users, auth, doctors, appointments, admin, notifications, media
+from app.services.media_cleanup import media_cleanup
+from app.services.outbox import notification_dispatcher
+from app.services.sweeper import appointment_sweeper
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION)
+# Background workers live for as long as the app does
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    replica_router.start()
+    await manager.start()
+    notification_dispatcher.start()
+    appointment_sweeper.start()
+    media_cleanup.start()
+    yield
+    await media_cleanup.stop()
+    await appointment_sweeper.stop()
+    await notification_dispatcher.stop()
+    await manager.stop()
+    await replica_router.stop()
+
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # frontend origin
     allow_credentials=True,
     allow_methods=["*"],  # allow POST, GET, OPTIONS, etc
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # let the frontend read pagination cursors
 )
+# Added last so it is the outermost layer and times everything, CORS included
+if settings.METRICS_ENABLED or settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(
+        RequestMetricsMiddleware,
+        record_metrics=settings.METRICS_ENABLED,
+        budget_mode=settings.QUERY_BUDGET_MODE,
+    )
 # Include routers
 app.include_router(users.router, prefix="/user", tags=["Users"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -18,7 +50,15 @@ app.include_router(doctors.router, prefix="/doctors", tags=["Doctors"])
 app.include_router(appointments.router, prefix="/appointments", tags=["Appointments"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
+if settings.MEDIA_BACKEND == "local":
+    app.include_router(media.router, prefix="/media", tags=["Media"])
 
 @app.get("/health")
 def health():
-    return {"message": "Hello! The Medical App backend is alive."}
\ No newline at end of file
+    return {"message": "Hello! The Medical App backend is alive."}
+
+# Prometheus scrape endpoint (process-local numbers, scrape every worker)
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,11 @@
+import os
+
+# The app reads its settings from the environment at import time, tests don't need real credentials
+from benchmarks.common import setup_env
+
+setup_env()
+# Every request the tests make must stay within its route's query_budget
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+# Importing the app registers every model, so relationships between them can be resolved
+import main  # noqa: E402,F401
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services import media_cleanup, sweeper
+from app.services.media_cleanup import MediaCleanupWorker
+from app.services.sweeper import AppointmentSweeper
+
+
+class FakeResult:
+    def scalar(self):
+        return True
+
+
+class FakeConnection:
+    """Grants the advisory lock, then fails the first statement after it like a broken query would."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, parameters=None):
+        sql = str(statement)
+        if "advisory" in sql:
+            self.calls.append(sql.split("(")[0].split()[-1])
+            return FakeResult()
+        self.calls.append("statement")
+        raise RuntimeError("statement failed")
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+
+class FakeEngine:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    def connect(self):
+        return self.conn
+
+
+class FakeStorage:
+    async def list_files(self, folder):
+        return []
+
+
+def test_sweeper_rolls_back_before_unlocking(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setattr(sweeper, "engine", fake)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(AppointmentSweeper(interval=60, batch_size=10).sweep())
+
+    assert fake.conn.calls == ["pg_try_advisory_lock", "commit", "statement", "rollback", "pg_advisory_unlock", "commit"]
+
+
+def test_reconcile_rolls_back_before_unlocking(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setattr(media_cleanup, "engine", fake)
+    monkeypatch.setattr(media_cleanup, "media_storage", FakeStorage())
+    worker = MediaCleanupWorker(batch_size=10, poll_interval=1, max_attempts=3, retry_base=2,
+                                reconcile_interval=60, orphan_grace=60, delete_orphans=True)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(worker.reconcile())
+
+    assert fake.conn.calls == ["pg_try_advisory_lock", "commit", "statement", "rollback", "pg_advisory_unlock", "commit"]
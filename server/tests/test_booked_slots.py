@@ -0,0 +1,42 @@
+import asyncio
+from datetime import time, timedelta
+from uuid import uuid4
+
+import httpx
+
+from app.core.database import get_read_db
+from app.services.slots import DoctorOccupancy, slot_engine
+from main import app
+
+
+async def _no_database():
+    # Any query would fail: a warm slot engine answers without one
+    yield None
+
+
+def test_polling_an_unchanged_day_is_a_304_without_a_query(monkeypatch):
+    start, end = slot_engine.horizon()
+    day = start + timedelta(days=1)
+    doctor_id = uuid4()
+    occupancy = DoctorOccupancy(doctor_id, "Dr. Test", "Cardiologist", True, start, end)
+    occupancy.set_booked(day, time(9, 30))
+    monkeypatch.setitem(slot_engine._doctors, doctor_id, occupancy)
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, _no_database)
+    params = {"doctor_id": str(doctor_id), "date": day.isoformat()}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/appointments/booked", params=params)
+            assert first.json() == ["09:30"]
+            etag = first.headers["ETag"]
+
+            unchanged = await client.get("/appointments/booked", params=params, headers={"If-None-Match": etag})
+            assert unchanged.status_code == 304
+
+            slot_engine.mark_booked(doctor_id, day, time(10, 0))
+            changed = await client.get("/appointments/booked", params=params, headers={"If-None-Match": etag})
+            assert changed.status_code == 200
+            assert changed.json() == ["09:30", "10:00"]
+            assert changed.headers["ETag"] != etag
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+import pytest
+
+from app.core import cloudinary_utils
+from app.core.cloudinary_utils import parse_url
+
+BASE = "https://res.cloudinary.com/medhelp"
+
+
+@pytest.mark.parametrize("url, expected", [
+    (f"{BASE}/image/upload/v1712/medhelp_profiles/my_pic.jpg", ("medhelp_profiles/my_pic", "image")),
+    (f"{BASE}/raw/upload/v1712/medhelp_degrees/degree.pdf", ("medhelp_degrees/degree.pdf", "raw")),
+    (f"{BASE}/image/upload/medhelp_profiles/my.pic.png", ("medhelp_profiles/my.pic", "image")),
+])
+def test_parse_url(url, expected):
+    assert parse_url(url) == expected
+
+
+def test_raw_files_are_deleted_as_raw(monkeypatch):
+    calls = []
+
+    def destroy(public_id, **options):
+        calls.append((public_id, options))
+        return {"result": "ok"}
+
+    monkeypatch.setattr(cloudinary_utils.cloudinary.uploader, "destroy", destroy)
+
+    cloudinary_utils.delete_file(f"{BASE}/raw/upload/v1712/medhelp_degrees/degree.pdf")
+
+    assert calls == [("medhelp_degrees/degree.pdf", {"resource_type": "raw"})]
+
+
+def test_failed_delete_raises(monkeypatch):
+    monkeypatch.setattr(cloudinary_utils.cloudinary.uploader, "destroy", lambda public_id, **options: {"result": "error"})
+
+    with pytest.raises(RuntimeError):
+        cloudinary_utils.delete_file(f"{BASE}/image/upload/v1712/medhelp_profiles/my_pic.jpg")
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services import media_cleanup
+from app.services.media_cleanup import MediaCleanupWorker
+
+OLD = datetime.now(timezone.utc) - timedelta(days=7)
+STORED = [
+    ("https://media.test/medhelp_profiles/kept.png", OLD),
+    ("https://media.test/medhelp_profiles/orphan.png", OLD),
+    ("https://media.test/medhelp_profiles/fresh.png", datetime.now(timezone.utc)),  # within the grace period
+]
+
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalar(self):
+        return True
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+
+class FakeConnection:
+    """Grants the advisory lock and knows one referenced URL. Records queued deletes."""
+
+    def __init__(self):
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, parameters=None):
+        if "advisory" in str(statement):
+            return FakeResult([])
+        if isinstance(parameters, list):
+            self.queued.extend(row["url"] for row in parameters)
+            return FakeResult([])
+        return FakeResult([STORED[0][0]])
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakeEngine:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    def connect(self):
+        return self.conn
+
+
+class FakeStorage:
+    async def list_files(self, folder):
+        return STORED if folder == "medhelp_profiles" else []
+
+
+def _reconcile(monkeypatch, delete_orphans: bool):
+    fake = FakeEngine()
+    monkeypatch.setattr(media_cleanup, "engine", fake)
+    monkeypatch.setattr(media_cleanup, "media_storage", FakeStorage())
+    worker = MediaCleanupWorker(batch_size=10, poll_interval=1, max_attempts=3, retry_base=2,
+                                reconcile_interval=60, orphan_grace=24 * 60 * 60, delete_orphans=delete_orphans)
+    found = asyncio.run(worker.reconcile())
+    return found, fake.conn.queued, worker
+
+
+def test_dry_run_only_counts_orphans(monkeypatch):
+    found, queued, worker = _reconcile(monkeypatch, delete_orphans=False)
+
+    assert found == 1
+    assert queued == []
+    assert worker.stats()["orphans_found"] == 1
+
+
+def test_orphans_are_queued_when_deletion_is_on(monkeypatch):
+    found, queued, _ = _reconcile(monkeypatch, delete_orphans=True)
+
+    assert found == 1
+    assert queued == ["https://media.test/medhelp_profiles/orphan.png"]
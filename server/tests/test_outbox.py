@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.ws_fanout import FanoutBackend
+from app.core.ws_manager import ConnectionManager
+from app.services.outbox import NotificationDispatcher
+
+
+class BrokenFanout(FanoutBackend):
+    async def publish(self, user_id, message):
+        raise ConnectionError("relay down")
+
+    async def publish_event(self, event, data):
+        raise ConnectionError("relay down")
+
+
+def _dispatcher():
+    return NotificationDispatcher(batch_size=10, poll_interval=1, max_attempts=3, retry_base=2)
+
+
+def _entry(entry_id: int, attempts: int = 0):
+    return SimpleNamespace(id=entry_id, attempts=attempts, available_at=None, last_error=None)
+
+
+def test_failed_relay_is_raised_to_the_dispatcher():
+    manager = ConnectionManager(BrokenFanout(), queue_size=10, heartbeat_interval=30, idle_timeout=90)
+    with pytest.raises(ConnectionError):
+        asyncio.run(manager.send_personal_message({"id": "1"}, uuid4()))
+
+
+def test_failed_push_is_retried_with_backoff():
+    dispatcher = _dispatcher()
+    now = datetime.now(timezone.utc)
+    delivered, failed = _entry(1), _entry(2)
+
+    finished = dispatcher.settle([delivered, failed], [None, ConnectionError("relay down")], now)
+
+    assert finished == [1]
+    assert failed.attempts == 1
+    assert (failed.available_at - now).total_seconds() == 4  # retry_base * 2 ** attempts
+    assert "relay down" in failed.last_error
+    assert (dispatcher.delivered, dispatcher.retried, dispatcher.dropped) == (1, 1, 0)
+
+
+def test_push_is_given_up_after_max_attempts():
+    dispatcher = _dispatcher()
+    entry = _entry(7, attempts=2)
+
+    finished = dispatcher.settle([entry], [ConnectionError("relay down")], datetime.now(timezone.utc))
+
+    assert finished == [7]
+    assert entry.attempts == 3
+    assert dispatcher.dropped == 1
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import date, time
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def _craft(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_round_trip_parses_each_value():
+    row_id = uuid4()
+    cursor = encode_cursor(date(2026, 10, 18), time(9, 30), row_id)
+
+    assert decode_cursor(cursor, date.fromisoformat, time.fromisoformat, UUID) == [date(2026, 10, 18), time(9, 30), row_id]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),  # not UTF-8
+    _craft({"id": "x"}),                             # not a list
+    _craft([str(uuid4()), str(uuid4())]),            # wrong length
+    _craft([123]),                                   # not a string
+    _craft([None]),
+    _craft([["nested"]]),
+    _craft(["not-a-uuid"]),                          # doesn't parse
+])
+def test_crafted_cursors_are_client_errors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, UUID)
+    assert error.value.status_code == 400
+
+
+def test_unparsable_date_is_a_client_error():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(_craft(["2026-13-45", "09:00:00", str(uuid4())]), date.fromisoformat, time.fromisoformat, UUID)
+    assert error.value.status_code == 400
@@ -0,0 +1,161 @@
+"""
+Query budgets in "raise" mode (set in conftest.py).
+
+The middleware tests run anywhere. The end-to-end test drives the real app through httpx
+ASGITransport against the database from DATABASE_URL (a throwaway one, it is seeded like
+benchmarks.bench_api) and is skipped when that database can't be reached.
+"""
+import asyncio
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, select, text
+
+from app.core.config import settings
+from app.core.request_metrics import QueryBudgetExceeded, RequestMetricsMiddleware, query_budget
+
+# SQLite through the stdlib driver: the statement hooks listen on every Engine, sync ones included
+sqlite = create_engine("sqlite://")
+
+
+def _budgeted_app(budget_mode: str) -> RequestMetricsMiddleware:
+    app = FastAPI()
+
+    @app.get("/statements/{count}")
+    @query_budget(2)
+    async def run_statements(count: int):
+        with sqlite.connect() as conn:
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+        return {"ran": count}
+
+    return RequestMetricsMiddleware(app, record_metrics=False, budget_mode=budget_mode)
+
+
+async def _get(app, path: str) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+def test_tests_run_with_budgets_enforced():
+    assert settings.QUERY_BUDGET_MODE == "raise"
+
+
+def test_request_within_budget_passes():
+    response = asyncio.run(_get(_budgeted_app("raise"), "/statements/2"))
+    assert response.json() == {"ran": 2}
+
+
+def test_request_over_budget_raises():
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 SQL statements, its query budget is 2"):
+        asyncio.run(_get(_budgeted_app("raise"), "/statements/3"))
+
+
+def test_warn_mode_only_reports():
+    response = asyncio.run(_get(_budgeted_app("warn"), "/statements/3"))
+    assert response.status_code == 200
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        RequestMetricsMiddleware(FastAPI(), budget_mode="strict")
+
+
+async def _database_reachable() -> bool:
+    from app.core.database import engine
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        await engine.dispose()
+
+
+async def _exercise_budgeted_routes():
+    from benchmarks import bench_api
+    from app.core.database import AsyncSessionLocal, engine
+    from app.core.security import create_access_token
+    from app.models.user import User
+    from main import app
+
+    data = await bench_api.seed(SimpleNamespace(doctors=3, patients=3, history=5))
+    async with AsyncSessionLocal() as db:
+        doctor_email = (await db.execute(
+            select(User.email).where(User.email == bench_api.DOCTOR_EMAIL.format(0))
+        )).scalar_one()
+        admin = (await db.execute(select(User).where(User.email == "budget-test-admin@example.com"))).scalar()
+        if admin is None:
+            admin = User(id=uuid.uuid4(), email="budget-test-admin@example.com", full_name="Budget Admin",
+                         role="admin", is_active=True)
+            db.add(admin)
+            await db.commit()
+
+    patient = data["auth"][0]
+    doctor = {"Authorization": f"Bearer {create_access_token(data={'sub': doctor_email, 'role': 'doctor'})}"}
+    admin_auth = {"Authorization": f"Bearer {create_access_token(data={'sub': admin.email, 'role': 'admin', 'id': str(admin.id)})}"}
+    doctor_id = str(data["doctor_ids"][0])
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+
+    async def check(response: httpx.Response, *expected: int) -> httpx.Response:
+        # Over-budget requests never get here: the middleware raises QueryBudgetExceeded through the transport
+        assert response.status_code in (expected or (200,)), response.text
+        return response
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await check(await client.post("/auth/login", data={
+                "username": data["patients"][0].email, "password": bench_api.PASSWORD,
+            }))
+            await check(await client.get("/user/me", headers=patient))
+
+            # Cold caches first, then warm
+            for _ in range(2):
+                await check(await client.get("/doctors/", params={"page": 1, "limit": 6}))
+                await check(await client.get(f"/doctors/{doctor_id}/availability"))
+                await check(await client.get("/doctors/earliest-slots", params={"specialization": "Cardiologist"}))
+            # No limit sent: every match (the database may hold more doctors than were seeded here)
+            everyone = (await check(await client.get("/doctors/search", params={"name": "Dr"}))).json()
+            assert len(everyone) >= 3
+            paged = await check(await client.get("/doctors/search", params={"name": "Dr", "page": 1, "limit": 2}))
+            assert len(paged.json()) == 2
+            await check(await client.get(f"/doctors/{doctor_id}/slots"))
+            await check(await client.get("/doctors/me", headers=doctor))
+
+            booked = await check(await client.post("/appointments/book", headers=patient, json={
+                "doctor_id": doctor_id, "appointment_date": tomorrow, "appointment_time": "09:00:00",
+            }), 201)
+            appointment_id = booked.json()["appointment_id"]
+            await check(await client.get("/appointments/booked", params={"doctor_id": doctor_id, "date": tomorrow}))
+            # Without limit: the whole history, at least the seeded visits plus the booking
+            history = await check(await client.get("/appointments/", headers=patient))
+            assert len(history.json()) >= 6 and "X-Next-Cursor" not in history.headers
+            paged = await check(await client.get("/appointments/", headers=patient, params={"limit": 2, "status": "COMPLETED"}))
+            assert len(paged.json()) == 2 and paged.headers["X-Next-Cursor"]
+            await check(await client.get("/appointments/pendingAppointments", headers=doctor))
+            await check(await client.put(f"/appointments/{appointment_id}/status", headers=doctor,
+                                         json={"status": "CONFIRMED"}))
+
+            await check(await client.get("/notifications/", headers=patient))
+            await check(await client.get("/notifications/feed", headers=patient))
+            await check(await client.get("/notifications/unread-count", headers=patient))
+            await check(await client.patch("/notifications/read", headers=patient, json={}))
+
+            await check(await client.get("/admin/doctors/pending", headers=admin_auth))
+            await check(await client.get("/admin/users", headers=admin_auth))
+            await check(await client.get("/admin/appointments", headers=admin_auth))
+            await check(await client.get("/admin/stats", headers=admin_auth))
+            await check(await client.get("/admin/export/users", headers=admin_auth))
+    finally:
+        await engine.dispose()
+
+
+def test_budgeted_routes_stay_within_budget():
+    if not asyncio.run(_database_reachable()):
+        pytest.skip("DATABASE_URL is not reachable")
+    asyncio.run(_exercise_budgeted_routes())
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import date, time
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.slots import DoctorOccupancy, SlotEngine
+
+DAY = date(2026, 10, 19)  # a Monday
+
+
+def _occupancy() -> DoctorOccupancy:
+    entry = DoctorOccupancy(uuid4(), "Dr. Test", "Cardiologist", True, DAY, DAY)
+    entry.add_rule("Monday", time(9, 0), time(11, 0))
+    return entry
+
+
+def test_release_keeps_a_minute_another_booking_still_holds():
+    entry = _occupancy()
+    entry.set_booked(DAY, time(9, 0, 0))
+    entry.set_booked(DAY, time(9, 0, 30))
+
+    entry.set_booked(DAY, time(9, 0, 0), False)
+    assert 540 not in entry.free_minutes(DAY, 30)
+
+    entry.set_booked(DAY, time(9, 0, 30), False)
+    assert 540 in entry.free_minutes(DAY, 30)
+
+
+def test_marking_the_same_booking_twice_needs_one_release():
+    entry = _occupancy()
+    entry.set_booked(DAY, time(9, 30))
+    entry.set_booked(DAY, time(9, 30))
+
+    entry.set_booked(DAY, time(9, 30), False)
+
+    assert entry.free_minutes(DAY, 30) == [540, 570, 600, 630]
+
+
+def test_specialization_filter_takes_wildcards_literally(monkeypatch):
+    captured = []
+
+    async def load(db, doctor_filters):
+        captured.extend(doctor_filters)
+        return []
+
+    engine = SlotEngine(ttl_seconds=60, horizon_days=14)
+    monkeypatch.setattr(engine, "load", load)
+
+    asyncio.run(engine.get_specialization(None, " 100%_Dent "))
+
+    condition = captured[-1].compile(dialect=postgresql.dialect())
+    assert condition.params["specialization_1"] == "%100\\%\\_dent%"
+    assert "ESCAPE" in str(condition)
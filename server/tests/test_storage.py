@@ -0,0 +1,107 @@
+import asyncio
+import io
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.media_backends import LocalBackend, StorageBackend
+from app.services.storage import MediaStorage
+
+
+class SlowBackend(StorageBackend):
+    """Blocking calls with injected latency, like a slow Cloudinary."""
+    name = "slow"
+
+    def __init__(self, upload_seconds: float):
+        self.upload_seconds = upload_seconds
+
+    def upload(self, file, folder):
+        time.sleep(self.upload_seconds)
+        return f"https://media.test/{folder}/{file.filename}"
+
+    def delete(self, url):
+        pass
+
+    def list_files(self, folder):
+        time.sleep(self.upload_seconds)  # many Admin API pages
+        return []
+
+
+def _file(name: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(b"degree"), filename=name, size=6)
+
+
+def _storage(upload_seconds: float, timeout_seconds: float, max_concurrency: int) -> MediaStorage:
+    return MediaStorage(max_concurrency=max_concurrency, timeout_seconds=timeout_seconds,
+                        max_upload_bytes=1024, backend=SlowBackend(upload_seconds))
+
+
+def test_event_loop_stays_responsive_during_an_upload_burst():
+    storage = _storage(upload_seconds=0.2, timeout_seconds=5, max_concurrency=2)
+
+    async def scenario():
+        gaps = []
+        uploads = asyncio.gather(*(storage.upload(_file(f"{i}.pdf")) for i in range(6)))
+
+        # Stands in for every other endpoint: it must keep getting the loop while uploads run
+        last = time.perf_counter()
+        while not uploads.done():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        return await uploads, gaps
+
+    started = time.perf_counter()
+    urls, gaps = asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+
+    assert urls == [f"https://media.test/medhelp_degrees/{i}.pdf" for i in range(6)]
+    assert elapsed >= 0.6  # 6 uploads, 2 at a time: the burst really was in flight
+    assert len(gaps) > 30
+    assert max(gaps) < 0.1
+    assert storage.stats()["in_flight"] == 0
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_is_done():
+    storage = _storage(upload_seconds=0.3, timeout_seconds=0.1, max_concurrency=1)
+
+    async def scenario():
+        assert await storage.upload(_file("slow.pdf")) is None  # timed out, thread still busy
+        assert storage.stats()["in_flight"] == 1
+        # Waits for the slot instead of timing out in the executor queue behind the stuck thread
+        await storage.remove("https://media.test/medhelp_degrees/old.pdf")
+
+    asyncio.run(scenario())
+
+    assert storage.timeouts == 1
+    assert storage.stats()["in_flight"] == 0
+
+
+def test_listing_is_not_cut_off_by_the_call_timeout():
+    storage = _storage(upload_seconds=0.2, timeout_seconds=0.05, max_concurrency=1)
+
+    assert asyncio.run(storage.list_files("medhelp_degrees")) == []
+
+
+def test_identical_uploads_get_their_own_files(tmp_path):
+    backend = LocalBackend(str(tmp_path), "http://localhost:8000/media")
+
+    first = backend.upload(_file("a.pdf"), "medhelp_degrees")
+    second = backend.upload(_file("b.pdf"), "medhelp_degrees")
+    assert first != second
+    assert first.rsplit("/", 1)[1].split("-")[0] == second.rsplit("/", 1)[1].split("-")[0]  # same content hash
+
+    # Deleting one user's file leaves the other's identical upload alone
+    backend.delete(first)
+    assert [url for url, _ in backend.list_files("medhelp_degrees")] == [second]
+
+
+def test_backends_must_implement_every_operation():
+    class UploadOnly(StorageBackend):
+        def upload(self, file, folder):
+            return None
+
+    with pytest.raises(TypeError):
+        UploadOnly()
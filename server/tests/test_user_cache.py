@@ -0,0 +1,68 @@
+import asyncio
+import uuid
+
+from app.core.ws_fanout import LocalFanout
+from app.core.ws_manager import manager
+from app.models.user import User
+from app.services import user as user_service
+from app.services.user import USER_INVALIDATED, get_cached_user_by_email, invalidate_cached_user, user_cache
+
+EMAIL = "cached-patient@example.com"
+
+
+class RecordingFanout(LocalFanout):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    async def publish_event(self, event, data):
+        self.events.append((event, data))
+
+
+class FakeResult:
+    def __init__(self, user):
+        self.user = user
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.user
+
+
+class InvalidatedMidRead:
+    """A session whose user lookup is overtaken by an invalidation from another worker."""
+
+    async def execute(self, statement):
+        manager.fanout._dispatch_event(USER_INVALIDATED, {"email": EMAIL})
+        return FakeResult(User(id=uuid.uuid4(), email=EMAIL, full_name="Stale", role="user", is_active=True))
+
+
+def test_invalidation_is_sent_to_the_other_workers(monkeypatch):
+    fanout = RecordingFanout()
+    monkeypatch.setattr(manager, "fanout", fanout)
+    user_cache.set(EMAIL, {"email": EMAIL})
+
+    asyncio.run(invalidate_cached_user(EMAIL))
+
+    assert user_cache.get(EMAIL) is None
+    assert fanout.events == [(USER_INVALIDATED, {"email": EMAIL})]
+
+
+def test_invalidation_from_another_worker_drops_the_entry():
+    user_cache.set(EMAIL, {"email": EMAIL})
+
+    manager.fanout._dispatch_event(USER_INVALIDATED, {"email": EMAIL})
+
+    assert user_cache.get(EMAIL) is None
+
+
+def test_read_overtaken_by_an_invalidation_is_not_cached():
+    user_cache.pop(EMAIL)
+    generation = user_service._generation
+
+    user = asyncio.run(get_cached_user_by_email(InvalidatedMidRead(), EMAIL))
+
+    assert user.full_name == "Stale"  # this request still uses what it read
+    assert user_service._generation == generation + 1
+    assert user_cache.get(EMAIL) is None  # but later ones go back to the database
@@ -0,0 +1,97 @@
+import asyncio
+from uuid import uuid4
+
+from app.core.ws_fanout import LocalFanout
+from app.core.ws_manager import IDLE_TIMEOUT, ConnectionManager
+
+HEARTBEAT = 0.05
+IDLE_TIMEOUT_SECONDS = 0.12
+
+
+class FakeClient:
+    """Answers every ping right away (if 'answers' is set), like the browser client does."""
+
+    def __init__(self, answers: bool = True):
+        self.answers = answers
+        self.connection = None
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+        if message == {"type": "ping"} and self.answers:
+            self.connection.touch()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _connect(manager: ConnectionManager, client: FakeClient):
+    client.connection = await manager.connect(client, uuid4())
+    return client.connection
+
+
+def _manager() -> ConnectionManager:
+    return ConnectionManager(LocalFanout(), queue_size=100, heartbeat_interval=HEARTBEAT,
+                             idle_timeout=IDLE_TIMEOUT_SECONDS)
+
+
+def test_busy_then_quiet_client_is_pinged_and_kept():
+    async def scenario():
+        manager = _manager()
+        client = FakeClient()
+        connection = await _connect(manager, client)
+
+        # Busy: a message more often than the heartbeat interval, for longer than the idle timeout
+        for i in range(15):
+            await manager.deliver_local(connection.user_id, {"id": i})
+            await asyncio.sleep(HEARTBEAT / 3)
+        # Then quiet for longer than the idle timeout
+        await asyncio.sleep(IDLE_TIMEOUT_SECONDS * 2)
+
+        assert client.closed_with is None
+        assert not connection.closed
+        assert manager.closed_idle == 0
+        assert {"type": "ping"} in client.sent[:16]  # pinged during the busy spell too
+        assert [m for m in client.sent if m != {"type": "ping"}] == [{"id": i} for i in range(15)]
+        await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_client_that_never_answers_is_closed():
+    async def scenario():
+        manager = _manager()
+        client = FakeClient(answers=False)
+        connection = await _connect(manager, client)
+
+        for i in range(15):
+            await manager.deliver_local(connection.user_id, {"id": i})
+            await asyncio.sleep(HEARTBEAT / 3)
+
+        assert client.closed_with == IDLE_TIMEOUT
+        assert manager.closed_idle == 1
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_close_task_is_kept_until_done():
+    async def scenario():
+        manager = ConnectionManager(LocalFanout(), queue_size=1, heartbeat_interval=30, idle_timeout=90)
+        client = FakeClient()
+        connection = await _connect(manager, client)
+        connection.writer.cancel()  # nobody drains the queue
+
+        await manager.deliver_local(connection.user_id, {"id": 1})
+        await manager.deliver_local(connection.user_id, {"id": 2})
+        assert manager.evicted_slow == 1
+        assert len(manager._closing) == 1
+
+        await asyncio.sleep(0.01)
+        assert client.closed_with is not None
+        assert not manager._closing
+
+    asyncio.run(scenario())